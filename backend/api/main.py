@@ -1,22 +1,46 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import functools
+import json
+import threading
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from pathlib import Path
-import shutil
+import os
 from typing import Any, List
 
 from ..core.config import settings
 from ..core.logger import get_logger
 from ..services.document_store import DocumentStore
 from ..services.orchestrator import Orchestrator
+from ..services.sqlite_store import SQLiteDocumentStore
+from .uploads import UPLOAD_OPENAPI, stream_upload
 
 log = get_logger("api")
 
-app = FastAPI(title="Intelligent Docs API", version="0.4.0")
+def _warm_orchestrator() -> None:
+    try:
+        get_orchestrator()
+    except Exception:
+        # an escaping error would cancel the task group and take the app down with it;
+        # _orchestrator stays None, so the first request retries the lazy init
+        log.exception("Orchestrator warm-up failed; first request will retry")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # warm the orchestrator in the background so the server starts accepting (e.g. /health) right away
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(anyio.to_thread.run_sync, _warm_orchestrator)
+        yield
+
+app = FastAPI(title="Intelligent Docs API", version="0.4.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[o.strip() for o in settings.cors_origins],
+    allow_origins=frozenset(settings.cors_origins),  # membership test per request
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -25,8 +49,25 @@ app.add_middleware(
 UPLOAD_DIR = Path(__file__).resolve().parent.parent / "data" / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-store = DocumentStore()
-orchestrator = Orchestrator(store=store)
+def _make_store() -> DocumentStore | SQLiteDocumentStore:
+    if settings.document_db_path:
+        return SQLiteDocumentStore(settings.document_db_path)  # shared by all workers
+    # documents live in this process's memory; extra workers would each see a different store
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        log.warning("WEB_CONCURRENCY > 1 without DOCUMENT_DB_PATH: documents will 404 on other workers")
+    return DocumentStore()
+
+_orchestrator: Orchestrator | None = None
+_orchestrator_lock = threading.Lock()
+
+def get_orchestrator() -> Orchestrator:
+    """Build the store + orchestrator once per process, on first use (sync dependency, so off the event loop)."""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = Orchestrator(store=_make_store())
+    return _orchestrator
 
 class DocumentCreateResponse(BaseModel):
     document_id: str
@@ -35,7 +76,7 @@ class DocumentCreateResponse(BaseModel):
 
 class SummaryResponse(BaseModel):
     document_id: str
-    status: str = Field(description="pending | ready | error | not_found")
+    status: str = Field(description="pending | processing | ready | error | not_found")
     summary: str | None = None
 
 class SummarySaveRequest(BaseModel):
@@ -60,6 +101,15 @@ class QAResponse(BaseModel):
     sources: List[str] = []
     validation: dict | None = None
 
+class OkResponse(BaseModel):
+    ok: bool
+
+class ValidationResponse(OkResponse):
+    validation: dict | None = None
+
+class RegenerateResponse(ValidationResponse):
+    summary: str | None = None
+
 class VersionsResponseItem(BaseModel):
     index: int
     created_at: str
@@ -67,30 +117,49 @@ class VersionsResponseItem(BaseModel):
     validation: dict | None = None
     word_count: int | None = None
 
-SUPPORTED_TYPES = {".pdf", ".docx", ".txt", ".html", ".htm"}
+class DocumentBundleResponse(BaseModel):
+    summary: SummaryResponse
+    entities: EntitiesResponse
+    versions: List[VersionsResponseItem]
+
+SUPPORTED_TYPES = frozenset({".pdf", ".docx", ".txt", ".html", ".htm"})
+UPLOAD_CHUNK_BYTES = settings.upload_write_bytes
 
-@app.post("/documents", response_model=DocumentCreateResponse)
-async def upload_document(file: UploadFile = File(...)):
-    ext = Path(file.filename).suffix.lower()
+def _check_upload_type(filename: str) -> None:
+    ext = os.path.splitext(filename)[1].lower()
     if ext not in SUPPORTED_TYPES:
         raise HTTPException(status_code=415, detail=f"Unsupported file type: {ext}")
 
-    dest = UPLOAD_DIR / file.filename
-    with dest.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
-
-    document_id = orchestrator.ingest_document(filename=file.filename, saved_path=str(dest))
-    status = store.get(document_id).status
-    return DocumentCreateResponse(document_id=document_id, filename=file.filename, status=status)
+@app.post("/documents", response_model=DocumentCreateResponse, openapi_extra=UPLOAD_OPENAPI)
+async def upload_document(request: Request, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    # cheap early reject; the multipart body is slightly larger than the file itself
+    if int(request.headers.get("content-length") or 0) > settings.max_upload_bytes + 64 * 1024:
+        raise HTTPException(status_code=413, detail="file_too_large")
+
+    # stream the file part straight from the request body to disk, hashing in the same pass
+    upload = await stream_upload(
+        request,
+        UPLOAD_DIR,
+        field="file",
+        check_filename=_check_upload_type,
+        max_bytes=settings.max_upload_bytes,
+        write_bytes=UPLOAD_CHUNK_BYTES,
+    )
+
+    # register now, parse/index/summarize in the background; clients poll GET /documents/{id}/summary
+    document_id = await anyio.to_thread.run_sync(functools.partial(orchestrator.register_document, filename=upload.filename, saved_path=str(upload.path), content_hash=upload.sha256))
+    orchestrator.submit_processing(document_id)
+    status = (await anyio.to_thread.run_sync(orchestrator.store.get, document_id)).status
+    return DocumentCreateResponse(document_id=document_id, filename=upload.filename, status=status)
 
 @app.get("/documents/{document_id}/summary", response_model=SummaryResponse)
-async def get_summary(document_id: str):
-    result = orchestrator.get_summary(document_id=document_id)
-    return SummaryResponse(document_id=document_id, **result)
+async def get_summary(document_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    result = await anyio.to_thread.run_sync(functools.partial(orchestrator.get_summary, document_id=document_id))
+    return SummaryResponse.model_construct(document_id=document_id, **result)
 
-@app.post("/documents/{document_id}/summary")
-async def save_summary(document_id: str, req: SummarySaveRequest):
-    result = orchestrator.save_summary(document_id=document_id, summary=req.summary)
+@app.post("/documents/{document_id}/summary", response_model=ValidationResponse)
+async def save_summary(document_id: str, req: SummarySaveRequest, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    result = await anyio.to_thread.run_sync(functools.partial(orchestrator.save_summary, document_id=document_id, summary=req.summary))
     if not result.get("ok"):
         raise HTTPException(status_code=404, detail="Document not found")
     return {"ok": True, "validation": result.get("validation")}
@@ -103,48 +172,83 @@ async def save_summary(document_id: str, req: SummarySaveRequest):
 #     return {"ok": True, "validation": ok.get("validation")}
 
 # backend/api/main.py (inside the same file)
-@app.post("/documents/{document_id}/summarize")
-async def regenerate_summary(document_id: str, req: SummarizeRequest):
-    ok = orchestrator.generate_summary(document_id=document_id, target_words=req.target_words)
+@app.post("/documents/{document_id}/summarize", response_model=RegenerateResponse)
+async def regenerate_summary(document_id: str, req: SummarizeRequest, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    ok = await anyio.to_thread.run_sync(functools.partial(orchestrator.generate_summary, document_id=document_id, target_words=req.target_words))
     if not ok.get("ok"):
         raise HTTPException(status_code=404, detail=ok.get("error","regenerate_failed"))
     # fetch the latest summary so UI can refresh instantly
-    latest = orchestrator.get_summary(document_id=document_id)
+    latest = await anyio.to_thread.run_sync(functools.partial(orchestrator.get_summary, document_id=document_id))
     return {"ok": True, "validation": ok.get("validation"), "summary": latest.get("summary")}
 
 
-@app.post("/documents/{document_id}/summary/validate")
-async def validate_summary_route(document_id: str):
-    res = orchestrator.validate_current_summary(document_id=document_id)
+@app.post("/documents/{document_id}/summary/validate", response_model=ValidationResponse)
+async def validate_summary_route(document_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    res = await anyio.to_thread.run_sync(functools.partial(orchestrator.validate_current_summary, document_id=document_id))
     if not res.get("ok"):
         raise HTTPException(status_code=404, detail=res.get("error","not_found"))
     return {"ok": True, "validation": res["validation"]}
 
 @app.get("/documents/{document_id}/summary/versions", response_model=List[VersionsResponseItem])
-async def list_summary_versions(document_id: str):
-    items = orchestrator.list_summary_versions(document_id=document_id)
-    return [VersionsResponseItem(**it) for it in items]
-
-@app.post("/documents/{document_id}/summary/rollback")
-async def rollback_summary(document_id: str, version_index: int = 0):
-    res = orchestrator.rollback_summary(document_id=document_id, version_index=version_index)
+async def list_summary_versions(document_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    items = await anyio.to_thread.run_sync(functools.partial(orchestrator.list_summary_versions, document_id=document_id))
+    # rows are built by the store from trusted data; skip re-validation
+    return [VersionsResponseItem.model_construct(**it) for it in items]
+
+@app.get("/documents/{document_id}/bundle", response_model=DocumentBundleResponse)
+async def get_document_bundle(document_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    # summary + entities + versions in one round trip, for clients that show them together
+    def load() -> tuple[dict, dict, list]:
+        return (
+            orchestrator.get_summary(document_id=document_id),
+            orchestrator.get_entities(document_id=document_id),
+            orchestrator.list_summary_versions(document_id=document_id),
+        )
+
+    summary, entities, versions = await anyio.to_thread.run_sync(load)
+    if summary["status"] == "not_found":
+        raise HTTPException(status_code=404, detail="Document not found")
+    return DocumentBundleResponse.model_construct(
+        summary=SummaryResponse.model_construct(document_id=document_id, **summary),
+        entities=EntitiesResponse.model_construct(**entities),
+        versions=[VersionsResponseItem.model_construct(**it) for it in versions],
+    )
+
+@app.post("/documents/{document_id}/summary/rollback", response_model=OkResponse)
+async def rollback_summary(document_id: str, version_index: int = 0, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    res = await anyio.to_thread.run_sync(functools.partial(orchestrator.rollback_summary, document_id=document_id, version_index=version_index))
     if not res.get("ok"):
         raise HTTPException(status_code=404, detail="rollback_failed")
     return {"ok": True}
 
 @app.get("/documents/{document_id}/entities", response_model=EntitiesResponse)
-async def get_entities(document_id: str):
-    return orchestrator.get_entities(document_id=document_id)
+async def get_entities(document_id: str, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    return await anyio.to_thread.run_sync(functools.partial(orchestrator.get_entities, document_id=document_id))
 
-@app.post("/documents/{document_id}/entities")
-async def save_entities(document_id: str, req: EntitiesSaveRequest):
-    return orchestrator.save_entities(document_id=document_id, entities=req.entities)
+@app.post("/documents/{document_id}/entities", response_model=OkResponse)
+async def save_entities(document_id: str, req: EntitiesSaveRequest, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    return await anyio.to_thread.run_sync(functools.partial(orchestrator.save_entities, document_id=document_id, entities=req.entities))
 
 @app.post("/qa", response_model=QAResponse)
-async def qa(request: QARequest):
-    result = orchestrator.answer_question(question=request.question, document_ids=request.document_ids)
-    return QAResponse(answer=result["answer"], sources=result.get("sources", []), validation=result.get("validation"))
+async def qa(request: QARequest, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    result = await anyio.to_thread.run_sync(functools.partial(orchestrator.answer_question, question=request.question, document_ids=request.document_ids))
+    return QAResponse.model_construct(answer=result["answer"], sources=result.get("sources", []), validation=result.get("validation"))
+
+@app.post("/qa/stream")
+async def qa_stream(request: QARequest, orchestrator: Orchestrator = Depends(get_orchestrator)):
+    # NDJSON: {"delta": ...} lines while the answer is generated, then one final line:
+    # {"done": true, "sources": [...], "validation": {...}}, or {"done": false, "error": ...} if generation broke off;
+    # the generator is sync, so Starlette drives it from the threadpool
+    events = orchestrator.stream_answer(question=request.question, document_ids=request.document_ids)
+    return StreamingResponse((json.dumps(ev, ensure_ascii=False) + "\n" for ev in events), media_type="application/x-ndjson")
 
 @app.get("/health")
 async def health():
-    return {"ok": True, "env": settings.app_env}
+    res = {"ok": True, "env": settings.app_env, "ready": _orchestrator is not None}
+    if _orchestrator is not None:
+        res.update(
+            summary_cache=_orchestrator.summary_cache.stats,
+            summary_flights=_orchestrator.summary_flights.stats,
+            qa_cache=_orchestrator.qa_cache.stats,
+        )
+    return res
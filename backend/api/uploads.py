@@ -0,0 +1,175 @@
+"""
+Streaming multipart uploads.
+Writes the file part of a multipart/form-data request straight from the request
+stream to disk (hashing it on the way), instead of letting Starlette spool the
+whole body to a temp file that is then copied again.
+Each upload gets its own file name; the client's name is kept only as metadata, so a
+second upload of "report.pdf" can't overwrite one that is still queued for processing.
+"""
+from __future__ import annotations
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Optional
+from uuid import uuid4
+
+import anyio
+from fastapi import HTTPException, Request
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# OpenAPI body for routes that read the multipart stream themselves
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    path: Path
+    sha256: str
+    size: int
+
+
+class _FilePartWriter:
+    """MultipartParser callbacks that route one named file part to disk."""
+
+    def __init__(self, field: str, dest_dir: Path, check_filename: Callable[[str], None], max_bytes: int) -> None:
+        self.field = field.encode()
+        self.dest_dir = dest_dir
+        self.check_filename = check_filename
+        self.max_bytes = max_bytes
+        self.upload: Optional[StoredUpload] = None
+        self.out: Optional[BinaryIO] = None
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self._hash = hashlib.sha256()
+        self._opened = False
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._in_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if options.get(b"name") != self.field or b"filename" not in options or self.upload is not None:
+            return
+        filename = Path(options[b"filename"].decode("utf-8", "replace")).name
+        self.check_filename(filename)  # may raise HTTPException (e.g. 415) before anything is written
+        path = self.dest_dir / f"{uuid4().hex}{Path(filename).suffix}"  # parsers dispatch on the suffix
+        self.upload = StoredUpload(filename=filename, path=path, sha256="", size=0)
+        self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_file:
+            return
+        chunk = data[start:end]
+        self.upload.size += len(chunk)
+        if self.upload.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail="file_too_large")
+        self._hash.update(chunk)
+        self.pending.append(chunk)
+        self.pending_bytes += len(chunk)
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+    def flush(self) -> None:
+        if self.upload is not None and self.out is None:
+            self.out = self.upload.path.open("wb")
+            self._opened = True
+        if self.out is not None and self.pending:
+            self.out.write(b"".join(self.pending))
+        self.pending.clear()
+        self.pending_bytes = 0
+
+    def finish(self) -> StoredUpload:
+        self.flush()
+        self.out.close()
+        self.out = None
+        self.upload.sha256 = self._hash.hexdigest()
+        return self.upload
+
+    def abort(self) -> None:
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+        if self._opened:
+            self.upload.path.unlink(missing_ok=True)
+
+
+async def stream_upload(
+    request: Request,
+    dest_dir: Path,
+    *,
+    field: str = "file",
+    check_filename: Callable[[str], None] = lambda name: None,
+    max_bytes: int,
+    write_bytes: int = 1 << 20,
+) -> StoredUpload:
+    """Stream the `field` file part of a multipart request into `dest_dir`.
+
+    Parsing stays on the event loop; every open/write/close/unlink runs in a worker
+    thread, batched to `write_bytes`, so slow disks never stall other requests.
+    """
+    ctype, params = parse_options_header(request.headers.get("content-type"))
+    if ctype != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=422, detail="Expected multipart/form-data with a file field")
+
+    writer = _FilePartWriter(field, dest_dir, check_filename, max_bytes)
+    parser = MultipartParser(params[b"boundary"], writer.callbacks())
+    try:
+        async for data in request.stream():
+            parser.write(data)
+            if writer.pending_bytes >= write_bytes:
+                await anyio.to_thread.run_sync(writer.flush)
+        parser.finalize()
+        if writer.upload is None:
+            raise HTTPException(status_code=422, detail=f"Missing file field '{field}'")
+        return await anyio.to_thread.run_sync(writer.finish)
+    except FormParserError as e:
+        await anyio.to_thread.run_sync(writer.abort)
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+    except BaseException:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(writer.abort)
+        raise
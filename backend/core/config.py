@@ -3,6 +3,7 @@ Centralized configuration using environment variables.
 """
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from pathlib import Path
 import os
 
 load_dotenv()
@@ -11,11 +12,15 @@ class Settings(BaseModel):
     app_env: str = os.getenv("APP_ENV", "dev")
     api_host: str = os.getenv("API_HOST", "127.0.0.1")
     api_port: int = int(os.getenv("API_PORT", "8000"))
-    cors_origins: list[str] = os.getenv("CORS_ORIGINS", "http://localhost:8501").split(",")
+    # parsed once here (trimmed, empties dropped) rather than by every consumer
+    cors_origins: list[str] = [o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:8501").split(",") if o.strip()]
 
     # Optional database (pgvector)
     database_url: str | None = os.getenv("DATABASE_URL")
 
+    # Optional shared document store (SQLite file); unset keeps documents in process memory
+    document_db_path: str | None = os.getenv("DOCUMENT_DB_PATH") or None
+
     # Optional LLM
     llm_provider: str | None = os.getenv("LLM_PROVIDER")
     openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
@@ -23,4 +28,28 @@ class Settings(BaseModel):
     # NEW: default summary length (words)
     summary_words_default: int = int(os.getenv("SUMMARY_WORDS_DEFAULT", "350"))
 
+    # Token hash for HashedEmbeddings: md5 (default, stable) or xxh3 (needs xxhash; re-index stored vectors)
+    embed_hash: str = os.getenv("EMBED_HASH", "md5")
+
+    # Background ingestion: worker threads, and how long a "processing" claim lives before it can be reclaimed
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", "2"))
+    ingest_stale_s: int = int(os.getenv("INGEST_STALE_S", "900"))
+
+    # Chunks per embed_texts call when indexing a document
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+    # Upload size cap (bytes); larger uploads are rejected with 413
+    max_upload_bytes: int = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+    # Uploads are written to disk in batches of this many bytes (one write syscall per batch)
+    upload_write_bytes: int = max(64 * 1024, int(os.getenv("UPLOAD_WRITE_BYTES", str(1 << 20))))
+
+    # Exact-match summary cache (on disk, LRU + TTL)
+    llm_cache_dir: str = os.getenv("LLM_CACHE_DIR") or str(Path(__file__).resolve().parent.parent / "data" / "llm_cache")
+    llm_cache_max_items: int = int(os.getenv("LLM_CACHE_MAX_ITEMS", "512"))
+    llm_cache_ttl_s: int = int(os.getenv("LLM_CACHE_TTL_S", str(24 * 3600)))
+
+    # Semantic near-duplicate cache for /qa
+    qa_sem_cache_threshold: float = float(os.getenv("QA_SEM_CACHE_THRESHOLD", "0.95"))
+    qa_sem_cache_ttl_s: int = int(os.getenv("QA_SEM_CACHE_TTL_S", "3600"))
+
 settings = Settings()
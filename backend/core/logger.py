@@ -1,19 +1,92 @@
 """
 Single place to configure logging.
+Records are handed to a queue and written by one background thread, so request
+handlers never block on stdout/file I/O. The writer batches whatever is queued
+into a single write + flush instead of flushing after every record.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import time
+from typing import List
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: logging.handlers.QueueListener | None = None
+
+class _BatchedStreamHandler(logging.StreamHandler):
+    """Buffers formatted records and writes them out in one go on flush()."""
+
+    def __init__(self, stream=None, max_batch: int = 256) -> None:
+        super().__init__(stream)
+        self.max_batch = max_batch
+        self._buf: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buf.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buf) >= self.max_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buf and self.stream:
+                data, self._buf = "".join(self._buf), []
+                self.stream.write(data)
+            super().flush()
+        except (OSError, ValueError):
+            pass  # stream already closed (interpreter/test teardown)
+        finally:
+            self.release()
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Default asctime format, but strftime runs once per second rather than per record."""
+
+    _last_sec = -1
+    _last_str = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(self.default_time_format, self.converter(sec))
+            self._last_sec = sec
+        return self.default_msec_format % (self._last_str, record.msecs)
+
+class _BatchedQueueListener(logging.handlers.QueueListener):
+    """Flushes its handlers whenever the queue drains, i.e. once per burst of records."""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        if block and self.queue.empty():
+            for h in self.handlers:
+                h.flush()
+        return self.queue.get(block)
+
+def _start_listener() -> None:
+    global _listener
+    if _listener is not None:
+        return
+    handler = _BatchedStreamHandler(sys.stdout)
+    formatter = _CachedTimeFormatter(
+        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+    )
+    handler.setFormatter(formatter)
+    _listener = _BatchedQueueListener(_queue, handler)
+    _listener.start()
+    atexit.register(_listener.stop)  # drains pending records on shutdown
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger  # already configured
 
+    _start_listener()
     logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(_queue))
     return logger
@@ -1,20 +1,54 @@
 """
 Simple character-based chunking with overlap.
+Chunk boundaries are computed arithmetically up front, so callers can also get
+(start, end) offsets without re-deriving them from the chunk strings.
 """
-from typing import List
+from typing import Iterable, Iterator, List, Tuple
+
+def chunk_offsets(n: int, max_chars: int = 800, overlap: int = 120) -> List[Tuple[int, int]]:
+    """(start, end) spans covering [0, n); the last span is the first one that reaches n."""
+    if n <= 0:
+        return []
+    step = max_chars - overlap if max_chars > overlap else max_chars
+    step = max(1, step)
+    last = max(0, -(-(n - max_chars) // step)) * step  # first start whose chunk reaches n
+    return [(s, min(s + max_chars, n)) for s in range(0, last + 1, step)]
+
+def chunk_text_with_offsets(text: str, max_chars: int = 800, overlap: int = 120) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Same chunks as chunk_text, plus their offsets into text.strip()."""
+    text = text.strip()
+    spans = chunk_offsets(len(text), max_chars, overlap)
+    return [text[s:e] for s, e in spans], spans
 
 def chunk_text(text: str, max_chars: int = 800, overlap: int = 120) -> List[str]:
     text = text.strip()
-    if not text:
-        return []
-    chunks = []
-    start = 0
-    n = len(text)
-    while start < n:
-        end = min(start + max_chars, n)
-        chunk = text[start:end]
-        chunks.append(chunk)
-        if end >= n:
-            break
-        start = end - overlap if end - overlap > start else end
-    return chunks
+    return [text[s:e] for s, e in chunk_offsets(len(text), max_chars, overlap)]
+
+def chunk_text_iter(text: str, max_chars: int = 800, overlap: int = 120) -> Iterator[str]:
+    """Lazy chunk_text: yields one chunk at a time instead of holding them all."""
+    text = text.strip()
+    for s, e in chunk_offsets(len(text), max_chars, overlap):
+        yield text[s:e]
+
+def chunk_text_stream(pieces: Iterable[str], max_chars: int = 800, overlap: int = 120, sep: str = "\n") -> Iterator[str]:
+    """chunk_text(sep.join(pieces)), emitting each chunk as soon as enough text has arrived."""
+    step = max(1, max_chars - overlap if max_chars > overlap else max_chars)
+    buf, pos, started = "", 0, False
+    for i, piece in enumerate(pieces):
+        if i:
+            piece = sep + piece
+        if not started:
+            piece = piece.lstrip()  # leading whitespace of the whole text is stripped
+            if not piece:
+                continue
+            started = True
+        buf = buf[pos:] + piece
+        pos = 0
+        # a chunk is final only once non-whitespace text exists past its end (trailing space is stripped)
+        limit = len(buf.rstrip())
+        while pos + max_chars < limit:
+            yield buf[pos:pos + max_chars]
+            pos += step
+    tail = buf[pos:].rstrip()
+    for s, e in chunk_offsets(len(tail), max_chars, overlap):
+        yield tail[s:e]
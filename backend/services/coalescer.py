@@ -0,0 +1,39 @@
+"""
+In-flight request coalescing ("single flight").
+Concurrent calls that share a key wait on the first caller's result instead of
+issuing their own (e.g. several users regenerating the same summary at once).
+"""
+from __future__ import annotations
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+class RequestCoalescer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    def run(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return fut.result()
+        try:
+            res = fn(*args, **kwargs)
+            fut.set_result(res)
+            return res
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -8,17 +8,24 @@ from typing import Dict, List
 
 SENSITIVE = {"password", "ssn", "credit card", "api key"}
 
+# compiled once; one pass over the text finds every sensitive term
+_SENSITIVE_RE = re.compile("|".join(sorted(map(re.escape, SENSITIVE), key=len, reverse=True)), re.I)
+_PLACEHOLDER_RE = re.compile(r"lorem ipsum", re.I)
+_UNCERTAIN_RE = re.compile(r"\b(I think|maybe|not sure)\b", re.I)
+
+def _sensitive_issues(text: str) -> List[str]:
+    found = dict.fromkeys(m.group(0).lower() for m in _SENSITIVE_RE.finditer(text))
+    return [f"Contains sensitive term: {s}" for s in found]
+
 def critic_summary(summary: str) -> Dict:
     issues: List[str] = []
     if not summary or not summary.strip():
         issues.append("Empty summary.")
-    if "lorem ipsum" in summary.lower():
+    if _PLACEHOLDER_RE.search(summary):
         issues.append("Looks like placeholder text.")
     if len(summary.split()) < 100:
         issues.append("Too short to be useful.")
-    for s in SENSITIVE:
-        if s in summary.lower():
-            issues.append(f"Contains sensitive term: {s}")
+    issues.extend(_sensitive_issues(summary))
 
     return {"ok": len(issues) == 0, "issues": issues}
 
@@ -26,10 +33,8 @@ def critic_answer(answer: str) -> Dict:
     issues: List[str] = []
     if not answer or not answer.strip():
         issues.append("Empty answer.")
-    if re.search(r"\b(I think|maybe|not sure)\b", answer, flags=re.I):
+    if _UNCERTAIN_RE.search(answer):
         issues.append("Uncertain phrasing detected.")
-    for s in SENSITIVE:
-        if s in answer.lower():
-            issues.append(f"Contains sensitive term: {s}")
+    issues.extend(_sensitive_issues(answer))
 
     return {"ok": len(issues) == 0, "issues": issues}
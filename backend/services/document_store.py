@@ -2,35 +2,78 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict
 from uuid import uuid4
 from datetime import datetime
+import hashlib
+import threading
+import time
 
-@dataclass
+def hash_chunks(chunks: List[str]) -> str:
+    return hashlib.sha256("\x00".join(chunks).encode("utf-8")).hexdigest()
+
+@dataclass(slots=True)
 class SummaryVersion:
     content: str
     created_at: str
     note: str = ""
     validation: Optional[Dict] = None
 
-@dataclass
+@dataclass(slots=True)
 class DocumentRecord:
     id: str
     filename: str
     path: str
     summary: Optional[str] = None
-    status: str = "pending"  # pending | ready | error
+    status: str = "pending"  # pending | processing | ready | error
+    processing_since: Optional[float] = None  # epoch seconds when the current processing run was claimed
+    content_hash: Optional[str] = None  # sha256 of the uploaded bytes
+    chunks: Optional[List[str]] = field(default=None, repr=False)  # chunks last indexed in the vector store
+    chunks_hash: Optional[str] = None
+    indexed_mtime: Optional[float] = None  # file mtime when chunks were indexed
     summary_versions: List[SummaryVersion] = field(default_factory=list)
+    # API-shaped rows for summary_versions, appended on push so listing is a plain read
+    versions_view: List[Dict] = field(default_factory=list, repr=False)
 
 class DocumentStore:
     def __init__(self) -> None:
         self._docs: dict[str, DocumentRecord] = {}
+        # per-document write locks; reads are plain dict/attribute lookups
+        self._locks: dict[str, threading.RLock] = {}
+
+    def _lock(self, doc_id: str) -> threading.RLock:
+        lock = self._locks.get(doc_id)
+        return lock if lock is not None else self._locks.setdefault(doc_id, threading.RLock())
 
-    def add_document(self, filename: str, path: str) -> str:
+    def add_document(self, filename: str, path: str, content_hash: Optional[str] = None) -> str:
         doc_id = str(uuid4())
-        self._docs[doc_id] = DocumentRecord(id=doc_id, filename=filename, path=path)
+        self._locks[doc_id] = threading.RLock()
+        self._docs[doc_id] = DocumentRecord(id=doc_id, filename=filename, path=path, content_hash=content_hash)
         return doc_id
 
     def get(self, doc_id: str) -> DocumentRecord | None:
         return self._docs.get(doc_id)
 
+    def set_chunks(self, doc_id: str, chunks: List[str], mtime: float) -> None:
+        doc = self._docs.get(doc_id)
+        if doc:
+            chunks_hash = hash_chunks(chunks)
+            with self._lock(doc_id):
+                doc.chunks = chunks
+                doc.chunks_hash = chunks_hash
+                doc.indexed_mtime = mtime
+
+    def claim_processing(self, doc_id: str, stale_after_s: float = 900) -> bool:
+        """pending -> processing (or reclaim a run stuck longer than stale_after_s); True if this caller owns it."""
+        doc = self._docs.get(doc_id)
+        if not doc:
+            return False
+        now = time.time()
+        with self._lock(doc_id):
+            stale = doc.status == "processing" and (doc.processing_since or 0) < now - stale_after_s
+            if doc.status != "pending" and not stale:
+                return False
+            doc.status = "processing"
+            doc.processing_since = now
+            return True
+
     def _now(self) -> str:
         return datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
@@ -38,33 +81,50 @@ class DocumentStore:
         if doc_id not in self._docs:
             return -1
         ver = SummaryVersion(content=content, created_at=self._now(), note=note, validation=validation)
-        self._docs[doc_id].summary_versions.append(ver)
-        # also set current summary to this version
-        self._docs[doc_id].summary = content
-        self._docs[doc_id].status = "ready"
-        return len(self._docs[doc_id].summary_versions) - 1
+        doc = self._docs[doc_id]
+        with self._lock(doc_id):
+            doc.summary_versions.append(ver)
+            index = len(doc.summary_versions) - 1
+            doc.versions_view.append({
+                "index": index,
+                "created_at": ver.created_at,
+                "note": ver.note,
+                "validation": validation,
+                "word_count": validation.get("word_count") if validation else None,
+            })
+            # also set current summary to this version
+            doc.summary = content
+            doc.status = "ready"
+        return index
 
     def set_summary(self, doc_id: str, summary: str) -> None:
         # keep compatibility with older calls (no note/validation)
         self.push_summary_version(doc_id, summary, note="set_summary")
 
     def set_error(self, doc_id: str, message: str) -> None:
-        if doc_id in self._docs:
-            self._docs[doc_id].status = "error"
-            self._docs[doc_id].summary = message
+        doc = self._docs.get(doc_id)
+        if doc:
+            with self._lock(doc_id):
+                doc.status = "error"
+                doc.summary = message
 
     def list_summary_versions(self, doc_id: str) -> List[SummaryVersion]:
         doc = self._docs.get(doc_id)
         return doc.summary_versions if doc else []
 
+    def list_versions_view(self, doc_id: str) -> List[Dict]:
+        doc = self._docs.get(doc_id)
+        return doc.versions_view if doc else []
+
     def rollback_summary(self, doc_id: str, version_index: int) -> bool:
         doc = self._docs.get(doc_id)
         if not doc:
             return False
-        if 0 <= version_index < len(doc.summary_versions):
-            chosen = doc.summary_versions[version_index]
-            doc.summary = chosen.content
-            # push a new version marking rollback (so history is linear)
-            self.push_summary_version(doc_id, chosen.content, note=f"rollback_to_{version_index}", validation=chosen.validation)
-            return True
+        with self._lock(doc_id):
+            if 0 <= version_index < len(doc.summary_versions):
+                chosen = doc.summary_versions[version_index]
+                doc.summary = chosen.content
+                # push a new version marking rollback (so history is linear)
+                self.push_summary_version(doc_id, chosen.content, note=f"rollback_to_{version_index}", validation=chosen.validation)
+                return True
         return False
@@ -1,29 +1,64 @@
 """
 Tiny, dependency-free hashed embeddings (fixed dim).
 """
-from typing import List
+from functools import lru_cache
+from typing import List, Protocol
 import numpy as np
 import hashlib
 
+class Embedder(Protocol):
+    """Batch embedding contract used by VectorStore, SummaryAgent and the QA cache.
+
+    embed_texts embeds a whole list in one call (never per-chunk) and returns
+    an (N, dim) array of L2-normalized rows.
+    """
+    dim: int
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray: ...
+
+    def embed_query(self, text: str) -> np.ndarray: ...
+
 class HashedEmbeddings:
-    def __init__(self, dim: int = 384) -> None:
+    def __init__(self, dim: int = 384, query_cache_size: int = 4096, hash_name: str = "md5") -> None:
         self.dim = dim
+        self.hash_name = hash_name
+        if hash_name == "xxh3":
+            import xxhash  # optional; much cheaper than md5 but changes every bucket (re-index stored vectors)
+            self._bucket_uncached = lambda token: xxhash.xxh3_64_intdigest(token, seed=0) % dim
+        elif hash_name != "md5":
+            raise ValueError(f"Unsupported hash_name: {hash_name}")
+        # per-instance memo for single texts (repeated questions / cache lookups)
+        self._embed_one = lru_cache(maxsize=query_cache_size)(self._embed_one_uncached)
+        # token -> bucket memo; md5 stays the default hash so vectors are stable across processes
+        # (pgvector rows written earlier must still match), but each distinct token is hashed once
+        self._bucket = lru_cache(maxsize=1 << 16)(self._bucket_uncached)
 
     def _tokenize(self, text: str) -> List[str]:
-        return [t for t in text.lower().split() if t]
+        return text.lower().split()  # split() never yields empty tokens
 
-    def _bucket(self, token: str) -> int:
-        h = hashlib.md5(token.encode("utf-8")).hexdigest()
-        return int(h, 16) % self.dim
+    def _bucket_uncached(self, token: str) -> int:
+        # same value as int(hexdigest, 16), without the hex round-trip
+        return int.from_bytes(hashlib.md5(token.encode("utf-8")).digest(), "big") % self.dim
 
     def embed_texts(self, texts: List[str]) -> np.ndarray:
-        vecs = np.zeros((len(texts), self.dim), dtype=np.float32)
-        for i, t in enumerate(texts):
-            tokens = self._tokenize(t)
-            for tok in tokens:
-                idx = self._bucket(tok)
-                vecs[i, idx] += 1.0
-            norm = np.linalg.norm(vecs[i])
-            if norm > 0:
-                vecs[i] = vecs[i] / norm
+        n = len(texts)
+        bucket = self._bucket
+        token_lists = [self._tokenize(t) for t in texts]
+        counts = np.fromiter((len(toks) for toks in token_lists), dtype=np.intp, count=n)
+        # flat bucket ids for every token of every text, then one bincount over (doc, bucket) cells
+        idx = np.fromiter((bucket(tok) for toks in token_lists for tok in toks), dtype=np.intp, count=int(counts.sum()))
+        cells = np.repeat(np.arange(n, dtype=np.intp) * self.dim, counts) + idx
+        vecs = np.bincount(cells, minlength=n * self.dim).astype(np.float32).reshape(n, self.dim)
+        # L2-normalize all rows at once (all-zero rows stay zero)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        np.divide(vecs, norms, out=vecs, where=norms > 0)
         return vecs
+
+    def _embed_one_uncached(self, text: str) -> np.ndarray:
+        vec = self.embed_texts([text])[0]
+        vec.flags.writeable = False  # shared between callers via the cache
+        return vec
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single text, memoized; the returned vector is read-only."""
+        return self._embed_one(text)
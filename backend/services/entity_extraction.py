@@ -34,6 +34,11 @@ from __future__ import annotations
 import re
 from typing import Dict, List
 
+try:
+    import re2 as _scan_re  # optional (google-re2): linear-time matching for the entity scans below
+except ImportError:
+    _scan_re = re
+
 # -------- Preprocessing: remove headings / markdown noise --------
 HEADINGS_PHRASES = {
     "overview", "key points", "risks", "open questions",
@@ -47,25 +52,32 @@ HEADINGS_WORDS = {
 
 MD_HEADER_RE = re.compile(r"^\s{0,3}#{1,6}\s+.*$", re.M)
 MD_BULLETS_RE = re.compile(r"^\s*[-*+]\s+", re.M)
+# all section labels in one alternation (longest first), so stripping them is a single pass
+HEADINGS_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(p) for p in sorted(HEADINGS_PHRASES, key=len, reverse=True)) + r")\b",
+    re.I,
+)
+EMPHASIS_RE = re.compile(r"[`*_>#]+")
+SPACES_RE = re.compile(r"\s+")
+TRAILING_PUNCT_RE = re.compile(r"[.,;:)\]]+$")
 
 # -------- Date patterns --------
 MONTHS = (
     "Jan|January|Feb|February|Mar|March|Apr|April|May|Jun|June|Jul|July|Aug|August|"
     "Sep|Sept|September|Oct|October|Nov|November|Dec|December"
 )
-DATE_PAT = re.compile(
-    rf"\b("
+DATE_PAT = _scan_re.compile(
+    rf"(?i)\b("
     rf"(?:\d{{1,2}}[/-]\d{{1,2}}[/-]\d{{2,4}})"             # 12/31/2024 or 12-31-2024
     rf"|(?:\d{{4}}-\d{{2}}-\d{{2}})"                         # 2024-12-31
     rf"|(?:(?:{MONTHS})\s+\d{{1,2}},\s*\d{{4}})"             # December 31, 2024
     rf"|(?:\d{{1,2}}\s+(?:{MONTHS})\s+\d{{4}})"              # 31 December 2024
-    rf")\b",
-    re.I,
+    rf")\b"
 )
 
 # -------- Name patterns & filters --------
 # Two or three TitleCase tokens, or single TitleCase token (with filters)
-NAME_CANDIDATE = re.compile(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b")
+NAME_CANDIDATE = _scan_re.compile(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b")
 
 # Common capitalized words we DO NOT want as person names
 NAME_STOPWORDS = {
@@ -84,31 +96,37 @@ ORG_KEYWORDS = (
     "United Nations|World Bank|European Commission|IMF|OECD|NATO"
 )
 # Pattern A: "<Title Case...> <SUFFIX>"
-ORG_SUFFIX_PAT = re.compile(rf"\b([A-Z][A-Za-z&.\- ]+?)\s+({ORG_SUFFIX})\b")
+ORG_SUFFIX_PAT = _scan_re.compile(rf"\b([A-Z][A-Za-z&.\- ]+?)\s+({ORG_SUFFIX})\b")
 # Pattern B: phrases containing org keywords (e.g., "University of X", "Ministry of Y")
-ORG_KEYWORD_PAT = re.compile(
+ORG_KEYWORD_PAT = _scan_re.compile(
     rf"\b([A-Z][A-Za-z&.\- ]*(?:{ORG_KEYWORDS})[A-Za-z&.\- ]*)\b"
 )
+# Cheap necessary conditions for the two org patterns above. With backtracking `re` those
+# patterns are quadratic over long runs of words, so skip them when they cannot match.
+ORG_SUFFIX_HINT = re.compile(rf"\s(?:{ORG_SUFFIX})\b")
+ORG_KEYWORD_HINT = re.compile(ORG_KEYWORDS)
 
 def _strip_markup(text: str) -> str:
     # remove markdown headers & bullets
     text = MD_HEADER_RE.sub(" ", text)
     text = MD_BULLETS_RE.sub(" ", text)
     # strip common section labels
-    for p in sorted(HEADINGS_PHRASES, key=len, reverse=True):
-        text = re.sub(rf"\b{re.escape(p)}\b", " ", text, flags=re.I)
+    text = HEADINGS_RE.sub(" ", text)
     # strip emphasis markers
-    text = re.sub(r"[`*_>#]+", " ", text)
+    text = EMPHASIS_RE.sub(" ", text)
     # collapse spaces
-    return re.sub(r"\s+", " ", text).strip()
+    return SPACES_RE.sub(" ", text).strip()
+
+# built once; _is_bad_name_token runs for every candidate token
+BAD_NAME_TOKENS_LOWER = frozenset(
+    NAME_STOPWORDS_LOWER
+    | {m.lower() for m in MONTHS.split("|")}
+    | {"monday","tuesday","wednesday","thursday","friday","saturday","sunday"}
+)
+HEADING_OR_STOP_LOWER = frozenset(HEADINGS_WORDS | NAME_STOPWORDS_LOWER)
 
 def _is_bad_name_token(tok: str) -> bool:
-    tl = tok.lower()
-    return (
-        tl in NAME_STOPWORDS_LOWER
-        or tl in {m.lower() for m in MONTHS.split("|")}
-        or tl in {"monday","tuesday","wednesday","thursday","friday","saturday","sunday"}
-    )
+    return tok.lower() in BAD_NAME_TOKENS_LOWER
 
 def _keep_name_phrase(phrase: str) -> bool:
     parts = phrase.split()
@@ -116,8 +134,7 @@ def _keep_name_phrase(phrase: str) -> bool:
     if len(parts) == 1:
         return not _is_bad_name_token(parts[0])
     # reject phrases made entirely of heading words (e.g., "Key Points")
-    lowers = [p.lower() for p in parts]
-    if all(p in HEADINGS_WORDS or p in NAME_STOPWORDS_LOWER for p in lowers):
+    if all(p.lower() in HEADING_OR_STOP_LOWER for p in parts):
         return False
     # tiny filter: drop if any token is all-caps (likely acronym) except 2–3 letters
     for p in parts:
@@ -143,12 +160,14 @@ def extract_entities(text: str) -> Dict[str, List[str]]:
 
     # ---- Orgs
     orgs = []
-    for m in ORG_SUFFIX_PAT.finditer(clean):
-        orgs.append((m.group(1) + " " + m.group(2)).strip())
-    for m in ORG_KEYWORD_PAT.finditer(clean):
-        orgs.append(m.group(1).strip())
+    if ORG_SUFFIX_HINT.search(clean):
+        for m in ORG_SUFFIX_PAT.finditer(clean):
+            orgs.append((m.group(1) + " " + m.group(2)).strip())
+    if ORG_KEYWORD_HINT.search(clean):
+        for m in ORG_KEYWORD_PAT.finditer(clean):
+            orgs.append(m.group(1).strip())
     # small cleanup: remove trailing punctuation/spaces
-    orgs = [re.sub(r"[.,;:)\]]+$", "", o).strip() for o in orgs]
+    orgs = [TRAILING_PUNCT_RE.sub("", o).strip() for o in orgs]
     orgs = _uniq_keep_order(orgs)[:50]
 
     # ---- Names
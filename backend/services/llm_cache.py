@@ -0,0 +1,122 @@
+"""
+Exact-match cache for generated summaries.
+- Key: sha256 over the source text + generation params (mode, target_words, temperature, seed, ...).
+- Only deterministic requests are cacheable (extractive mode, temperature == 0, or a fixed seed).
+- Small in-memory LRU in front of one JSON file per key on disk; entries expire after `ttl_s`.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class LLMCache:
+    def __init__(self, root: str | Path, max_items: int = 512, mem_items: int = 64, ttl_s: int = 24 * 3600) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_items = max_items
+        self.mem_items = mem_items
+        self.ttl_s = ttl_s
+        self._mem: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def cache_key(
+        *,
+        text: str,
+        mode: str,
+        target_words: int,
+        temperature: float,
+        seed: int | None,
+        model: str = "gpt-4o-mini",
+        require_deterministic: bool = True,
+        **extra: Any,
+    ) -> Optional[str]:
+        """Return a cache key, or None when the request is non-deterministic (unless not required)."""
+        if require_deterministic and mode == "abstractive" and temperature != 0 and seed is None:
+            return None
+        payload = {
+            "text": text,
+            "mode": mode,
+            "target_words": target_words,
+            "temperature": temperature,
+            "seed": seed,
+            "model": model,
+            **extra,
+        }
+        blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=list)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_s
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        self._mem[key] = (created_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None:
+                try:
+                    rec = _loads(self._path(key).read_bytes())
+                    entry = (float(rec["created_at"]), rec["value"])
+                except (OSError, ValueError, KeyError):
+                    entry = None
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    self._mem.pop(key, None)
+                    self._path(key).unlink(missing_ok=True)
+                self.stats["misses"] += 1
+                return None
+            self._remember(key, *entry)
+            try:
+                os.utime(self._path(key))  # bump recency for on-disk LRU eviction
+            except OSError:
+                pass
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, value)
+            try:
+                self._path(key).write_bytes(_dumps({"created_at": created_at, "value": value}))
+                self._evict()
+            except OSError:
+                pass  # disk tier is best-effort; memory tier still serves hits
+
+    def _evict(self) -> None:
+        files = list(self.root.glob("*.json"))
+        if len(files) <= self.max_items:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for p in files[: len(files) - self.max_items]:
+            p.unlink(missing_ok=True)
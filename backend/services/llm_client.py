@@ -0,0 +1,47 @@
+"""
+Shared OpenAI client factory.
+Clients are cached per (api_key, base_url) so agents reuse one connection pool
+instead of opening new TCP/TLS connections per instance. Calls are bounded by a
+timeout and retried with exponential backoff by the SDK.
+"""
+from __future__ import annotations
+import atexit
+import os
+from functools import lru_cache
+
+# seconds; a hung API call would otherwise block its worker thread indefinitely
+_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+# retries on connection errors, 408/409/429 and 5xx, with exponential backoff
+_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+
+@lru_cache(maxsize=16)
+def _get_client(api_key: str, base_url: str | None):
+    import httpx
+    from openai import OpenAI
+    try:
+        import h2  # noqa: F401  optional; lets concurrent calls share connections
+        http2 = True
+    except ImportError:
+        http2 = False
+    http_client = httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        timeout=httpx.Timeout(_TIMEOUT_S, connect=_CONNECT_TIMEOUT_S),
+    )
+    client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=_MAX_RETRIES)
+    atexit.register(client.close)
+    return client
+
+
+def get_openai_client():
+    """Return the cached OpenAI client if LLM_PROVIDER=openai and a key is set, else None."""
+    provider = (os.getenv("LLM_PROVIDER") or "").lower()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if provider != "openai" or not api_key:
+        return None
+    try:
+        return _get_client(api_key, os.getenv("OPENAI_BASE_URL") or None)
+    except Exception:
+        return None
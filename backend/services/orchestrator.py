@@ -1,175 +1,218 @@
 from pathlib import Path
-from .document_store import DocumentStore
+from functools import lru_cache
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+from .document_store import DocumentStore, DocumentRecord, hash_chunks
+from .sqlite_store import SQLiteDocumentStore
 from ..core.logger import get_logger
 from ..core.config import settings
-from .parser import parse_file
-from .chunker import chunk_text
+from .parser import iter_file_text
+from .chunker import chunk_text_stream
 from .vector_store import VectorStore
+from .embeddings import HashedEmbeddings
 from .summary_agent import SummaryAgent
 from .entity_extraction import extract_entities
 from .qa_agent import QAAgent
 from .validator_agent import validate_summary, validate_answer
+from .llm_cache import LLMCache
+from .qa_cache import SemanticQACache
+from .coalescer import RequestCoalescer
+import random
 import time
 from .summary_agent import SummaryAgent
 from .entity_extraction import extract_entities
 
 log = get_logger("orchestrator")
 
+# seeds for regenerations without one; a private generator, because the extractive
+# summarizer reseeds the global `random` module on every call
+_seed_rng = random.Random()
+
+@lru_cache(maxsize=512)
+def _entities_for(summary: str) -> dict:
+    """Memoized extract_entities (the returned dict is shared; treat it as read-only)."""
+    return extract_entities(summary)
+
+@lru_cache(maxsize=32)
+def _chunks_for_file(path: str, mtime_ns: int, size: int) -> tuple[str, ...]:
+    """Parsed + chunked file content; (mtime_ns, size) in the key invalidates it when the file changes."""
+    # PDFs are chunked page by page as they are extracted, never as one joined string
+    return tuple(chunk_text_stream(iter_file_text(path, Path(path).suffix.lower())))
+
 class Orchestrator:
-    def __init__(self, store: DocumentStore) -> None:
+    def __init__(self, store: DocumentStore | SQLiteDocumentStore) -> None:
         self.store = store
-        self.vstore = VectorStore(dim=384)
-        self.summarizer = SummaryAgent()
+        # one embedder shared by retrieval, summarization and the QA cache
+        self.embedder = HashedEmbeddings(dim=384, hash_name=settings.embed_hash)
+        self.vstore = VectorStore(dim=384, embedder=self.embedder, batch_size=settings.embedding_batch_size)
+        self.summarizer = SummaryAgent(embedder=self.embedder)
         self.qa = QAAgent(self.vstore)
         self._entities: dict[str, dict] = {}
         self.default_summary_words = settings.summary_words_default if hasattr(settings, "summary_words_default") else 350
+        # validation bounds for the default target, computed once
+        self._default_min_words = int(self.default_summary_words*0.6)
+        self._default_max_words = int(self.default_summary_words*1.6)
+        self.summary_cache = LLMCache(settings.llm_cache_dir, max_items=settings.llm_cache_max_items, ttl_s=settings.llm_cache_ttl_s)
+        self.summary_flights = RequestCoalescer()
+        self.qa_cache = SemanticQACache(self.embedder, threshold=settings.qa_sem_cache_threshold, ttl_s=settings.qa_sem_cache_ttl_s)
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="index")
+        # background ingestion runs on its own pool so it never waits on tasks queued behind itself in _pool
+        self._ingest_pool = ThreadPoolExecutor(max_workers=settings.ingest_workers, thread_name_prefix="ingest")
 
     def _reparse_chunks(self, saved_path: str) -> list[str]:
-        ext = Path(saved_path).suffix.lower()
-        text = parse_file(saved_path, ext)
-        return chunk_text(text)
+        st = os.stat(saved_path)
+        return list(_chunks_for_file(saved_path, st.st_mtime_ns, st.st_size))
+
+    def _index_chunks(self, doc: DocumentRecord) -> list[str]:
+        """Chunks for a document, re-parsing/re-embedding only if the file changed since it was indexed."""
+        mtime = os.path.getmtime(doc.path)
+        if doc.chunks is not None and doc.indexed_mtime == mtime:
+            return doc.chunks
+        chunks = self._reparse_chunks(doc.path)
+        self._store_index(doc, chunks, mtime)
+        return chunks
+
+    def _store_index(self, doc: DocumentRecord, chunks: list[str], mtime: float) -> None:
+        if hash_chunks(chunks) != doc.chunks_hash:
+            self.vstore.upsert_document(doc.id, chunks)
+            self.qa_cache.clear()  # corpus changed; cached answers may be stale
+        self.store.set_chunks(doc.id, chunks, mtime)
 
-    def ingest_document(self, *, filename: str, saved_path: str) -> str:
-        doc_id = self.store.add_document(filename=filename, path=saved_path)
+    def _summarize_cached(
+        self,
+        chunks: list[str],
+        *,
+        target_words: int,
+        mode: str = "extractive_mmr",
+        temperature: float = 0.2,
+        seed: int | None = None,
+        seed_val: int = 42,
+        entities: tuple | None = None,
+    ) -> tuple[str, dict]:
+        """Summarize + validate; deterministic requests are served from the exact-match cache."""
+        # key on what was actually parsed: the file behind a document can be replaced by a later
+        # upload with the same name, so the original upload's hash may no longer describe `chunks`
+        params = dict(
+            text=hash_chunks(chunks), mode=mode, target_words=target_words,
+            temperature=temperature, seed=seed, entities=entities,
+        )
+        key = self.summary_cache.cache_key(**params)
+        cached = self.summary_cache.get(key) if key else None
+        if cached:
+            return cached["summary"], cached["validation"]
+
+        def _compute() -> tuple[str, dict]:
+            summary = self.summarizer.summarize(
+                chunks,
+                target_words=target_words,
+                mode=mode,
+                temperature=temperature,
+                seed=seed_val,
+                entities=entities,
+            )
+            val = validate_summary(summary, min_words=int(target_words*0.6), max_words=int(target_words*1.6))
+            if key:
+                self.summary_cache.set(key, {"summary": summary, "validation": val})
+            return summary, val
+
+        if key is None:
+            return _compute()  # a fresh sample was asked for; don't hand it someone else's
+        # identical deterministic requests already in flight share one summarizer call
+        return self.summary_flights.run(key, _compute)
+
+    def register_document(self, *, filename: str, saved_path: str, content_hash: str | None = None) -> str:
+        doc_id = self.store.add_document(filename=filename, path=saved_path, content_hash=content_hash)
         log.info("Document registered: %s", doc_id)
+        return doc_id
+
+    def submit_processing(self, doc_id: str) -> None:
+        """Queue parse/index/summarize for a registered document; status goes pending -> processing -> ready|error."""
+        self._ingest_pool.submit(self.process_document, doc_id)
+
+    def ingest_document(self, *, filename: str, saved_path: str, content_hash: str | None = None) -> str:
+        """Register and process synchronously (returns once the document is ready or failed)."""
+        doc_id = self.register_document(filename=filename, saved_path=saved_path, content_hash=content_hash)
+        self.process_document(doc_id)
+        return doc_id
+
+    def process_document(self, doc_id: str) -> None:
+        # only one worker (thread or process) gets to run a given document
+        if not self.store.claim_processing(doc_id, stale_after_s=settings.ingest_stale_s):
+            return
+        doc = self.store.get(doc_id)
+        saved_path = doc.path
         try:
+            mtime = os.path.getmtime(saved_path)
             chunks = self._reparse_chunks(saved_path)
-            self.vstore.upsert_document(doc_id, chunks)
+            # embedding/upsert and summarization only share the chunks; run them side by side
+            indexed = self._pool.submit(self._store_index, doc, chunks, mtime)
 
-            summary = self.summarizer.summarize(chunks, target_words=self.default_summary_words)
-            # Validate and save as a version
-            val = validate_summary(summary, min_words=int(self.default_summary_words*0.6), max_words=int(self.default_summary_words*1.6))
+            # Summarize + validate (cached) and save as a version
+            summary, val = self._summarize_cached(chunks, target_words=self.default_summary_words)
+            indexed.result()
             self.store.push_summary_version(doc_id, summary, note="ingest_summary", validation=val)
 
-            entities = extract_entities(summary)
+            entities = _entities_for(summary)
             self._entities[doc_id] = entities
             log.info("Ingest complete: %s", doc_id)
         except Exception as e:
             log.exception("Processing error")
             self.store.set_error(doc_id, f"Processing error: {e}")
-        return doc_id
-
-    # def generate_summary(self, *, document_id: str, target_words: int) -> dict:
-        doc = self.store.get(document_id)
-        if not doc:
-            return {"ok": False, "error": "not_found"}
-        try:
-            chunks = self._reparse_chunks(doc.path)
-            self.vstore.upsert_document(document_id, chunks)
-            summary = self.summarizer.summarize(chunks, target_words=target_words)
-            val = validate_summary(summary, min_words=int(target_words*0.6), max_words=int(target_words*1.6))
-            self.store.push_summary_version(document_id, summary, note=f"regen_{target_words}", validation=val)
-            self._entities[document_id] = extract_entities(summary)
-            return {"ok": True, "validation": val}
-        except Exception as e:
-            log.exception("Regeneration error")
-            self.store.set_error(document_id, f"Processing error: {e}")
-            return {"ok": False, "error": "processing_error"}
 
     def generate_summary(self, *, document_id: str, target_words: int, mode: str = "extractive_mmr", temperature: float = 0.2, seed: int | None = None) -> dict:
         doc = self.store.get(document_id)
         if not doc:
             return {"ok": False, "error": "not_found"}
         try:
-            chunks = self._reparse_chunks(doc.path)
-            self.vstore.upsert_document(document_id, chunks)
+            chunks = self._index_chunks(doc)
             # compute entities first to feed to structured output
             cur_summary = doc.summary or ""
-            ents = extract_entities(cur_summary) if cur_summary else {"names": [], "dates": [], "organizations": []}
-            seed_val = int(seed if seed is not None else time.time() % 10_000)
-            summary = self.summarizer.summarize(
+            ents = _entities_for(cur_summary) if cur_summary else {"names": [], "dates": [], "organizations": []}
+            seed_val = int(seed) if seed is not None else _seed_rng.randrange(1_000_000)
+            summary, val = self._summarize_cached(
                 chunks,
                 target_words=target_words,
                 mode=mode,
                 temperature=temperature,
-                seed=seed_val,
+                seed=seed,
+                seed_val=seed_val,
                 entities=(ents.get("names", []), ents.get("dates", []), ents.get("organizations", [])),
             )
-            val = validate_summary(summary, min_words=int(target_words*0.6), max_words=int(target_words*1.6))
             self.store.push_summary_version(document_id, summary, note=f"regen_{mode}_{target_words}_t{temperature}_seed{seed_val}", validation=val)
-            self._entities[document_id] = extract_entities(summary)
+            self._entities[document_id] = _entities_for(summary)
             return {"ok": True, "validation": val, "summary": summary}
         except Exception as e:
             log.exception("Regeneration error")
             self.store.set_error(document_id, f"Processing error: {e}")
             return {"ok": False, "error": "processing_error"}
 
-    
-
-    # def generate_summary(self, *, document_id: str, target_words: int, mode: str = "extractive_mmr", temperature: float = 0.2, seed: int | None = None) -> dict:
-        doc = self.store.get(document_id)
-        if not doc:
-            return {"ok": False, "error": "not_found"}
-        try:
-            chunks = self._reparse_chunks(doc.path)
-            self.vstore.upsert_document(document_id, chunks)
-
-            # prepare entities (optional for formatting)
-            cur_summary = doc.summary or ""
-            ents = extract_entities(cur_summary) if cur_summary else {"names": [], "dates": [], "organizations": []}
-
-            # >>> ensure randomness when seed is None
-            seed_val = int(seed) if seed is not None else int(time.time() * 1000) % 1_000_000
-
-            summary = self.summarizer.summarize(
-                chunks,
-                target_words=target_words,
-                mode=mode,
-                temperature=temperature,
-                seed=seed_val,
-                entities=(ents.get("names", []), ents.get("dates", []), ents.get("organizations", [])),
-            )
-
-            val = validate_summary(summary, min_words=int(target_words*0.6), max_words=int(target_words*1.6))
-            self.store.push_summary_version(
-                document_id, summary,
-                note=f"regen_{mode}_{target_words}_t{temperature}_seed{seed_val}",
-                validation=val
-            )
-            self._entities[document_id] = extract_entities(summary)
-            return {"ok": True, "validation": val, "summary": summary, "seed": seed_val}  # return seed for debugging
-        except Exception as e:
-            log.exception("Regeneration error")
-            self.store.set_error(document_id, f"Processing error: {e}")
-            return {"ok": False, "error": "processing_error"}
-
-
     def get_summary(self, *, document_id: str) -> dict:
         doc = self.store.get(document_id)
         if not doc:
             return {"status": "not_found", "summary": None}
+        if doc.status == "processing" and (doc.processing_since or 0) < time.time() - settings.ingest_stale_s:
+            self.submit_processing(document_id)  # the run that claimed it died; reclaim
         return {"status": doc.status, "summary": doc.summary}
 
     def save_summary(self, *, document_id: str, summary: str) -> dict:
         doc = self.store.get(document_id)
         if not doc:
             return {"ok": False, "error": "not_found"}
-        val = validate_summary(summary, min_words=int(self.default_summary_words*0.6), max_words=int(self.default_summary_words*1.6))
+        val = validate_summary(summary, min_words=self._default_min_words, max_words=self._default_max_words)
         self.store.push_summary_version(document_id, summary, note="manual_save", validation=val)
-        self._entities[document_id] = extract_entities(summary)
+        self._entities[document_id] = _entities_for(summary)
         return {"ok": True, "validation": val}
 
     def validate_current_summary(self, *, document_id: str) -> dict:
         doc = self.store.get(document_id)
         if not doc or not doc.summary:
             return {"ok": False, "error": "not_found_or_empty"}
-        val = validate_summary(doc.summary, min_words=int(self.default_summary_words*0.6), max_words=int(self.default_summary_words*1.6))
+        val = validate_summary(doc.summary, min_words=self._default_min_words, max_words=self._default_max_words)
         return {"ok": True, "validation": val}
 
     def list_summary_versions(self, *, document_id: str) -> list[dict]:
-        doc = self.store.get(document_id)
-        if not doc:
-            return []
-        out = []
-        for idx, v in enumerate(self.store.list_summary_versions(document_id)):
-            out.append({
-                "index": idx,
-                "created_at": v.created_at,
-                "note": v.note,
-                "validation": v.validation,
-                "word_count": v.validation.get("word_count") if v.validation else None
-            })
-        return out
+        return self.store.list_versions_view(document_id)
 
     def rollback_summary(self, *, document_id: str, version_index: int) -> dict:
         ok = self.store.rollback_summary(document_id, version_index)
@@ -181,7 +224,7 @@ class Orchestrator:
         doc = self.store.get(document_id)
         if not doc or not doc.summary:
             return {"status": "pending", "entities": None}
-        ents = extract_entities(doc.summary)
+        ents = _entities_for(doc.summary)
         self._entities[document_id] = ents
         return {"status": "ready", "entities": ents}
 
@@ -190,8 +233,37 @@ class Orchestrator:
         return {"ok": True}
 
     def answer_question(self, *, question: str, document_ids: list[str] | None) -> dict:
+        cached = self.qa_cache.lookup(question, document_ids)
+        if cached:
+            log.info("QA cache hit")
+            return cached
         # (document_ids filtering is future work; we search across all indexed docs for now)
         result = self.qa.answer(question=question, top_k=5)
         val = validate_answer(result["answer"], result.get("contexts", []))
         result["validation"] = val
+        self.qa_cache.add(question, document_ids, result)
         return result
+
+    def stream_answer(self, *, question: str, document_ids: list[str] | None) -> Iterator[dict]:
+        """answer_question() as events: {"delta": text} while the answer is generated, then a final event.
+
+        The final event is {"done": True, "sources", "validation"}, or {"done": False, "error", "sources"}
+        when the LLM stream broke off; a cut-off answer is neither validated nor cached.
+        """
+        result = self.qa_cache.lookup(question, document_ids)
+        if result:
+            log.info("QA cache hit")
+            yield {"delta": result["answer"]}
+        else:
+            for part in self.qa.answer_stream(question=question, top_k=5):
+                if isinstance(part, str):
+                    yield {"delta": part}
+                else:
+                    result = part
+            if result.get("error"):
+                log.warning("QA stream interrupted: %s", result["error"])
+                yield {"done": False, "error": result["error"], "sources": result.get("sources", [])}
+                return
+            result["validation"] = validate_answer(result["answer"], result.get("contexts", []))
+            self.qa_cache.add(question, document_ids, result)
+        yield {"done": True, "sources": result.get("sources", []), "validation": result.get("validation")}
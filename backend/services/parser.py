@@ -1,29 +1,117 @@
 """
 Parses PDF/DOCX/TXT/HTML to plain text.
 """
+import importlib.util
+import mmap
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
 from pathlib import Path
-from bs4 import BeautifulSoup
+from typing import Iterator, List
+
+# lxml is a C parser backend for bs4, several times faster than html.parser (checked without importing it)
+_HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# pypdf is pure Python (threads don't help), so big PDFs are split across processes
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+def _read_text(path: str) -> str:
+    """Same result as Path.read_text(encoding="utf-8", errors="ignore"), decoded straight from an mmap
+    so large files skip the intermediate bytes copy."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, "utf-8", "ignore")
+    if "\r" in text:  # text-mode newline translation
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 def parse_text_file(path: str) -> str:
-    return Path(path).read_text(encoding="utf-8", errors="ignore")
+    return _read_text(path)
 
-def parse_pdf(path: str) -> str:
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # runs in a worker process; pypdf readers can't be pickled, so each worker opens its own
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def iter_pdf_pages(path: str) -> Iterator[str]:
     from pypdf import PdfReader
     reader = PdfReader(path)
+    n = len(reader.pages)
+    workers = min(PDF_MAX_WORKERS, n // max(1, PDF_PARALLEL_MIN_PAGES // 2))
+    if n < PDF_PARALLEL_MIN_PAGES or workers < 2:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+    # contiguous page ranges, a few per worker; map() keeps page order so callers can still stream
+    per = max(1, -(-n // (workers * 4)))
+    starts = range(0, n, per)
+    # spawn, not fork: the API process has live threads (log listener, pools)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for pages in pool.map(_extract_page_range, [path] * len(starts), starts, [min(s + per, n) for s in starts]):
+            yield from pages
+
+def parse_pdf(path: str) -> str:
+    return "\n".join(iter_pdf_pages(path))
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_RUN_TEXT = {_W + "t": None, _W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+def _docx_paragraph_text(p: ElementTree.Element) -> str:
+    # same rules as python-docx's Paragraph.text: runs and hyperlinked runs, tabs/breaks as characters
     parts = []
-    for page in reader.pages:
-        txt = page.extract_text() or ""
-        parts.append(txt)
-    return "\n".join(parts)
+    for child in p:
+        if child.tag == _W + "r":
+            runs = (child,)
+        elif child.tag == _W + "hyperlink":
+            runs = [r for r in child if r.tag == _W + "r"]
+        else:
+            continue
+        for r in runs:
+            for e in r:
+                if e.tag == _W + "br":
+                    if e.get(_W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif e.tag in _W_RUN_TEXT:
+                    parts.append(_W_RUN_TEXT[e.tag] or e.text or "")
+    return "".join(parts)
+
+def iter_docx_paragraphs(path: str) -> Iterator[str]:
+    """Body paragraphs (what python-docx's doc.paragraphs gives), streamed from word/document.xml
+    without building the whole tree."""
+    try:
+        zf = zipfile.ZipFile(path)
+        source = zf.open("word/document.xml")
+    except (zipfile.BadZipFile, KeyError):
+        import docx  # python-docx; unusual package layouts, and a proper error for non-DOCX input
+        yield from (p.text for p in docx.Document(path).paragraphs)
+        return
+    with zf, source:
+        depth, body = 0, None
+        for event, el in ElementTree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2:
+                    body = el
+                continue
+            if depth == 3:  # direct child of w:body; table paragraphs are not body paragraphs
+                if el.tag == _W + "p":
+                    yield _docx_paragraph_text(el)
+                del body[:]  # drop what has been read
+            depth -= 1
 
 def parse_docx(path: str) -> str:
-    import docx  # python-docx
-    doc = docx.Document(path)
-    return "\n".join(p.text for p in doc.paragraphs)
+    return "\n".join(iter_docx_paragraphs(path))
 
 def parse_html(path: str) -> str:
-    html = Path(path).read_text(encoding="utf-8", errors="ignore")
-    soup = BeautifulSoup(html, "html.parser")
+    html = _read_text(path)
+    from bs4 import BeautifulSoup  # only HTML needs it; keeps it out of worker start-up
+    soup = BeautifulSoup(html, _HTML_PARSER)
     for tag in soup(["script", "style"]):
         tag.decompose()
     return soup.get_text(separator="\n")
@@ -39,3 +127,12 @@ def parse_file(path: str, ext: str) -> str:
     if ext in {".html", ".htm"}:
         return parse_html(path)
     return parse_text_file(path)
+
+def iter_file_text(path: str, ext: str) -> Iterator[str]:
+    """Text pieces whose "\n"-join equals parse_file(path, ext); PDFs stream page by page, DOCX by paragraph."""
+    if ext.lower() == ".pdf":
+        yield from iter_pdf_pages(path)
+    elif ext.lower() == ".docx":
+        yield from iter_docx_paragraphs(path)
+    else:
+        yield parse_file(path, ext)
@@ -3,50 +3,60 @@ Q&A agent: retrieves top chunks and answers.
 - If OpenAI configured: answer with LLM over context.
 - Else: simple extractive fallback using the most relevant chunks.
 """
+import itertools
 import os
-from typing import List, Tuple
+import re
+from typing import Iterator, List, Tuple, Union
 from .vector_store import VectorStore
+from .llm_client import get_openai_client
+
+_WORD = re.compile(r"\S+")  # same boundaries as str.split()
+_FALLBACK_WORDS = 200
+
+# Static prompt prefix (kept first so provider prompt caching can reuse it)
+_QA_INSTRUCTIONS = (
+    "Use the context below to answer the user's question. "
+    "Be concise and precise. If the context is insufficient, say so.\n\n"
+    "=== CONTEXT START ===\n"
+)
 
 class QAAgent:
     def __init__(self, vstore: VectorStore) -> None:
         self.vstore = vstore
         self.provider = (os.getenv("LLM_PROVIDER") or "").lower()
         self.openai_key = os.getenv("OPENAI_API_KEY")
-        self._client = None
-        if self.provider == "openai" and self.openai_key:
-            try:
-                from openai import OpenAI
-                self._client = OpenAI(api_key=self.openai_key)
-            except Exception:
-                self._client = None
+        self._client = get_openai_client()
 
     def _fallback_answer(self, question: str, contexts: List[str]) -> str:
         # Concatenate top contexts and return a concise stitched answer.
         joined = "\n".join(contexts)
         # Heuristic: take first ~180-220 words from context as a “best-effort” answer.
-        words = joined.split()
-        if len(words) > 200:
-            joined = " ".join(words[:200]) + " ..."
+        # tokenize only as far as needed to know whether there are more than 200 words
+        words = [m.group() for m in itertools.islice(_WORD.finditer(joined), _FALLBACK_WORDS + 1)]
+        if len(words) > _FALLBACK_WORDS:
+            joined = " ".join(words[:_FALLBACK_WORDS]) + " ..."
         return f"Based on the most relevant passages:\n\n{joined}"
 
-    def answer(self, *, question: str, top_k: int = 5) -> dict:
+    def _prompt(self, question: str, contexts: List[str]) -> str:
+        return (
+            _QA_INSTRUCTIONS
+            + "\n\n".join(contexts[:5]) +
+            "\n=== CONTEXT END ===\n\n"
+            f"Question: {question}"
+        )
+
+    def _retrieve(self, question: str, top_k: int) -> Tuple[List[str], List[str]]:
         results: List[Tuple[str, int, float, str]] = self.vstore.search(question, top_k=top_k)
-        sources = [f"{r[0]}:chunk{r[1]}" for r in results]
-        contexts = [r[3] for r in results]
+        return [f"{r[0]}:chunk{r[1]}" for r in results], [r[3] for r in results]
+
+    def answer(self, *, question: str, top_k: int = 5) -> dict:
+        sources, contexts = self._retrieve(question, top_k)
 
         if self._client and contexts:
-            prompt = (
-                "Use the context below to answer the user's question. "
-                "Be concise and precise. If the context is insufficient, say so.\n\n"
-                "=== CONTEXT START ===\n"
-                + "\n\n".join(contexts[:5]) +
-                "\n=== CONTEXT END ===\n\n"
-                f"Question: {question}"
-            )
             try:
                 resp = self._client.chat.completions.create(
                     model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=[{"role": "user", "content": self._prompt(question, contexts)}],
                     temperature=0.1,
                 )
                 answer = resp.choices[0].message.content.strip()
@@ -57,3 +67,39 @@ class QAAgent:
         # Fallback
         answer = self._fallback_answer(question, contexts[:3])
         return {"answer": answer, "sources": sources, "contexts": contexts[:3]}
+
+    def answer_stream(self, *, question: str, top_k: int = 5) -> Iterator[Union[str, dict]]:
+        """Like answer(), but yields the answer text piece by piece as the LLM produces it, then the result dict.
+
+        If the LLM stream fails after some text was yielded, the result dict carries an "error" key.
+        """
+        sources, contexts = self._retrieve(question, top_k)
+
+        if self._client and contexts:
+            parts: List[str] = []
+            try:
+                stream = self._client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": self._prompt(question, contexts)}],
+                    temperature=0.1,
+                    stream=True,
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                if parts:  # part of the answer is already out: report it as cut off, not as complete
+                    yield {"answer": "".join(parts).strip(), "sources": sources, "contexts": contexts[:5],
+                           "error": "llm_stream_interrupted"}
+                    return
+            else:
+                if parts:  # otherwise nothing has been sent yet: fall back like answer() does
+                    yield {"answer": "".join(parts).strip(), "sources": sources, "contexts": contexts[:5]}
+                    return
+
+        # Fallback
+        answer = self._fallback_answer(question, contexts[:3])
+        yield answer
+        yield {"answer": answer, "sources": sources, "contexts": contexts[:3]}
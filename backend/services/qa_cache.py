@@ -0,0 +1,94 @@
+"""
+Semantic near-duplicate cache for Q&A.
+- Exact tier: normalized question + document_ids -> result, checked before anything is embedded.
+- Semantic tier: embeds questions with the vector store's embedder and keeps recent (question -> result) pairs.
+  A lookup hits when cosine >= threshold, the requested document_ids match, and both questions
+  have the same content words (a near-miss like "...in 2021" vs "...in 2022" scores high on a
+  bag-of-words embedding, and a wrong cached answer is worse than a miss).
+- Bounded (oldest evicted first) with a TTL; cleared whenever the indexed corpus changes.
+"""
+from __future__ import annotations
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from .embeddings import Embedder
+
+# words whose presence or absence doesn't change what a question asks
+_FILLER = frozenset(
+    "a an the is are was were be been do does did of please can could would you me tell i".split()
+)
+
+def _content_terms(question: str) -> frozenset:
+    return frozenset(re.findall(r"\w+", question.lower())) - _FILLER
+
+
+class SemanticQACache:
+    def __init__(self, embedder: Embedder, threshold: float = 0.95, max_items: int = 256,
+                 exact_items: int = 512, ttl_s: int = 3600) -> None:
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_items = max_items
+        self.exact_items = exact_items
+        self.ttl_s = ttl_s
+        self._rows: List[tuple[np.ndarray, frozenset, float, Dict[str, Any], frozenset]] = []  # (vec, doc_ids, created_at, result, terms)
+        self._exact: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()  # key -> (created_at, result)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "exact_hits": 0, "misses": 0}
+
+    def _embed(self, question: str) -> np.ndarray:
+        return self.embedder.embed_query(question)
+
+    @staticmethod
+    def _exact_key(question: str, document_ids: List[str] | None) -> str:
+        norm = " ".join(question.lower().split()) + "|" + ",".join(sorted(document_ids or []))
+        return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).hexdigest()
+
+    def lookup(self, question: str, document_ids: List[str] | None) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        key = self._exact_key(question, document_ids)
+        with self._lock:
+            hit = self._exact.get(key)
+            if hit is not None and now - hit[0] <= self.ttl_s:
+                self._exact.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["exact_hits"] += 1
+                return hit[1]
+        qvec = self._embed(question)
+        docs = frozenset(document_ids or [])
+        terms = _content_terms(question)
+        with self._lock:
+            self._rows = [r for r in self._rows if now - r[2] <= self.ttl_s]
+            best, best_score = None, -1.0
+            if self._rows:
+                scores = np.stack([r[0] for r in self._rows]) @ qvec
+                for row, score in zip(self._rows, scores):
+                    if row[1] == docs and row[4] == terms and score > best_score:
+                        best, best_score = row, float(score)
+            if best is None or best_score < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return best[3]
+
+    def add(self, question: str, document_ids: List[str] | None, result: Dict[str, Any]) -> None:
+        qvec = self._embed(question)
+        key = self._exact_key(question, document_ids)
+        now = time.time()
+        with self._lock:
+            self._rows.append((qvec, frozenset(document_ids or []), now, result, _content_terms(question)))
+            if len(self._rows) > self.max_items:
+                del self._rows[: len(self._rows) - self.max_items]
+            self._exact[key] = (now, result)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.exact_items:
+                self._exact.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._exact.clear()
@@ -0,0 +1,166 @@
+"""
+SQLite-backed DocumentStore.
+- Same methods as DocumentStore, but documents and summary versions live in one
+  SQLite file (WAL mode), so every API worker process sees the same documents.
+- get() returns a DocumentRecord snapshot without summary_versions; use
+  list_summary_versions / list_versions_view for history.
+- Chunk/index bookkeeping (set_chunks) stays per-process: it describes this
+  process's in-memory vector index, not the shared document.
+"""
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from .document_store import DocumentRecord, SummaryVersion, hash_chunks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    summary TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    content_hash TEXT,
+    processing_since REAL
+);
+CREATE TABLE IF NOT EXISTS summary_versions (
+    doc_id TEXT NOT NULL REFERENCES documents(id),
+    idx INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    validation_json TEXT,
+    PRIMARY KEY (doc_id, idx)
+);
+"""
+
+
+class SQLiteDocumentStore:
+    def __init__(self, path: str | Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        self._conn.executescript(_SCHEMA)
+        cols = {row[1] for row in self._conn.execute("PRAGMA table_info(documents);")}
+        if "processing_since" not in cols:  # files created before background ingest
+            self._conn.execute("ALTER TABLE documents ADD COLUMN processing_since REAL;")
+        self._lock = threading.RLock()  # one connection, shared by the worker's threads
+        self._indexed: Dict[str, Tuple[List[str], str, float]] = {}  # doc_id -> (chunks, chunks_hash, mtime)
+
+    def _now(self) -> str:
+        return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+    def add_document(self, filename: str, path: str, content_hash: Optional[str] = None) -> str:
+        doc_id = str(uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO documents (id, filename, path, content_hash) VALUES (?, ?, ?, ?);",
+                (doc_id, filename, path, content_hash),
+            )
+        return doc_id
+
+    def get(self, doc_id: str) -> DocumentRecord | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, filename, path, summary, status, content_hash, processing_since FROM documents WHERE id=?;", (doc_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        chunks, chunks_hash, mtime = self._indexed.get(doc_id, (None, None, None))
+        return DocumentRecord(
+            id=row[0], filename=row[1], path=row[2], summary=row[3], status=row[4], content_hash=row[5], processing_since=row[6],
+            chunks=chunks, chunks_hash=chunks_hash, indexed_mtime=mtime,
+        )
+
+    def set_chunks(self, doc_id: str, chunks: List[str], mtime: float) -> None:
+        self._indexed[doc_id] = (chunks, hash_chunks(chunks), mtime)
+
+    def claim_processing(self, doc_id: str, stale_after_s: float = 900) -> bool:
+        """pending -> processing (or reclaim a run stuck longer than stale_after_s); atomic across workers."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE documents SET status='processing', processing_since=? "
+                "WHERE id=? AND (status='pending' OR (status='processing' AND processing_since < ?));",
+                (now, doc_id, now - stale_after_s),
+            )
+        return cur.rowcount == 1
+
+    def push_summary_version(self, doc_id: str, content: str, note: str = "", validation: Optional[Dict] = None) -> int:
+        created_at = self._now()
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE;")  # serializes the index allocation across processes
+            try:
+                if cur.execute("SELECT 1 FROM documents WHERE id=?;", (doc_id,)).fetchone() is None:
+                    cur.execute("ROLLBACK;")
+                    return -1
+                (index,) = cur.execute(
+                    "SELECT COALESCE(MAX(idx) + 1, 0) FROM summary_versions WHERE doc_id=?;", (doc_id,)
+                ).fetchone()
+                cur.execute(
+                    "INSERT INTO summary_versions (doc_id, idx, content, created_at, note, validation_json) VALUES (?, ?, ?, ?, ?, ?);",
+                    (doc_id, index, content, created_at, note, json.dumps(validation) if validation is not None else None),
+                )
+                # also set current summary to this version
+                cur.execute("UPDATE documents SET summary=?, status='ready' WHERE id=?;", (content, doc_id))
+                cur.execute("COMMIT;")
+            except BaseException:
+                cur.execute("ROLLBACK;")
+                raise
+        return index
+
+    def set_summary(self, doc_id: str, summary: str) -> None:
+        # keep compatibility with older calls (no note/validation)
+        self.push_summary_version(doc_id, summary, note="set_summary")
+
+    def set_error(self, doc_id: str, message: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE documents SET status='error', summary=? WHERE id=?;", (message, doc_id))
+
+    def _versions(self, doc_id: str, with_content: bool) -> List[tuple]:
+        cols = "idx, created_at, note, validation_json" + (", content" if with_content else "")
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {cols} FROM summary_versions WHERE doc_id=? ORDER BY idx;", (doc_id,)
+            ).fetchall()
+
+    def list_summary_versions(self, doc_id: str) -> List[SummaryVersion]:
+        return [
+            SummaryVersion(content=content, created_at=created_at, note=note,
+                           validation=json.loads(val) if val is not None else None)
+            for _, created_at, note, val, content in self._versions(doc_id, with_content=True)
+        ]
+
+    def list_versions_view(self, doc_id: str) -> List[Dict]:
+        rows = []
+        for idx, created_at, note, val in self._versions(doc_id, with_content=False):
+            validation = json.loads(val) if val is not None else None
+            rows.append({
+                "index": idx,
+                "created_at": created_at,
+                "note": note,
+                "validation": validation,
+                "word_count": validation.get("word_count") if validation else None,
+            })
+        return rows
+
+    def rollback_summary(self, doc_id: str, version_index: int) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, validation_json FROM summary_versions WHERE doc_id=? AND idx=?;", (doc_id, version_index)
+            ).fetchone()
+        if row is None:
+            return False
+        content, val = row
+        # push a new version marking rollback (so history is linear)
+        self.push_summary_version(doc_id, content, note=f"rollback_to_{version_index}",
+                                  validation=json.loads(val) if val is not None else None)
+        return True
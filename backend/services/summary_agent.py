@@ -111,13 +111,30 @@ Improved SummaryAgent with:
 - target_words, temperature, seed to vary regenerations
 - structured output sections
 """
+import hashlib
 import os
 import re
 import random
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 import numpy as np
 
-from .embeddings import HashedEmbeddings
+from .embeddings import Embedder, HashedEmbeddings
+from .llm_client import get_openai_client
+
+# Upper bound on concurrent LLM calls when summarizing several documents at once
+_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "5"))
+# Long documents are summarized map-reduce style: ~4k-token windows in parallel, then one combining call
+_MAP_WINDOW_CHARS = 16000
+_MAP_MAX_WINDOWS = 32
+# Shared by every in-flight chat call, so nested fan-out (batch x windows) stays within the limit
+_LLM_SLOTS = threading.BoundedSemaphore(_MAX_CONCURRENCY)
+# Recent extractive bodies kept per agent (regenerations / abstractive fallbacks repeat them)
+_EXTRACTIVE_CACHE_ITEMS = 64
+# Sentence vectors kept across summarize() calls (~1.5 KB each at dim 384)
+_SENTENCE_VEC_ITEMS = 16384
 
 _SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
 _WORD = re.compile(r"\b\w+\b")
@@ -129,36 +146,93 @@ def _sentences(text: str) -> List[str]:
     s = [x.strip() for x in _SENT_SPLIT.split(text.strip()) if x.strip()]
     return s if s else ([text.strip()] if text.strip() else [])
 
-def _tf_score(text: str) -> dict:
-    freqs = {}
-    for w in _WORD.findall(text.lower()):
-        if len(w) >= 3:
-            freqs[w] = freqs.get(w, 0) + 1
-    return freqs
+def _tf_score(text: str) -> Counter:
+    # Counter does the accumulation in C; missing words read as 0
+    return Counter(w for w in _WORD.findall(text.lower()) if len(w) >= 3)
+
+def _join_capped(chunks: List[str], limit: int, sep: str = "\n") -> str:
+    """Equivalent to sep.join(chunks)[:limit] without joining chunks past the limit."""
+    parts: List[str] = []
+    size = 0
+    for c in chunks:
+        if parts and size >= limit:
+            break
+        size += len(c) + (len(sep) if parts else 0)
+        parts.append(c)
+    return sep.join(parts)[:limit]
+
+def _windows(chunks: List[str], max_chars: int, sep: str = "\n") -> List[str]:
+    """Group consecutive chunks into sep-joined windows of at most ~max_chars."""
+    out: List[str] = []
+    cur: List[str] = []
+    size = 0
+    for c in chunks:
+        if cur and size + len(sep) + len(c) > max_chars:
+            out.append(sep.join(cur))
+            cur, size = [], 0
+        size += len(c) + (len(sep) if cur else 0)
+        cur.append(c)
+    if cur:
+        out.append(sep.join(cur))
+    return out
+
+class _SentenceVectorCache:
+    """Embedder wrapper that remembers sentence vectors (LRU), so regenerating a document
+    only embeds sentences it hasn't seen recently."""
 
-def _mmr_select(sents: List[str], k: int, embedder: HashedEmbeddings, lambda_weight: float = 0.7) -> List[int]:
+    def __init__(self, embedder: Embedder, max_items: int = _SENTENCE_VEC_ITEMS) -> None:
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.max_items = max_items
+        self._vecs: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            rows = [self._vecs.get(t) for t in texts]
+            for t, v in zip(texts, rows):
+                if v is not None:
+                    self._vecs.move_to_end(t)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, rows) if v is None))
+        if missing:
+            # one batched call for all misses (duplicates embedded once)
+            fresh = dict(zip(missing, self.embedder.embed_texts(missing).copy()))
+            with self._lock:
+                self._vecs.update(fresh)
+                while len(self._vecs) > self.max_items:
+                    self._vecs.popitem(last=False)
+            rows = [fresh[t] if v is None else v for t, v in zip(texts, rows)]
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack(rows)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embedder.embed_query(text)
+
+def _mmr_select(sents: List[str], k: int, embedder: Embedder, lambda_weight: float = 0.7) -> List[int]:
     """Maximal Marginal Relevance: diversity-aware top-k sentence indices."""
     if not sents:
         return []
-    vecs = embedder.embed_texts(sents)
+    vecs = embedder.embed_texts(sents)  # rows are L2-normalized
     centroid = np.mean(vecs, axis=0)
     # relevance: similarity to centroid
-    rel = vecs @ centroid
+    rel = (vecs @ centroid).astype(np.float64)
+    # max_sim[i] = max similarity of sentence i to anything chosen so far, updated with one
+    # mat-vec per pick instead of re-scanning every chosen sentence for every candidate
+    max_sim = np.zeros(len(sents))
+    taken = np.zeros(len(sents), dtype=bool)
     chosen: List[int] = []
-    cand = set(range(len(sents)))
     while len(chosen) < min(k, len(sents)):
-        best_i = None
-        best_score = -1e9
-        for i in cand:
-            div = 0.0
-            if chosen:
-                div = max(float(vecs[i] @ vecs[j]) for j in chosen)
-            score = lambda_weight * float(rel[i]) - (1 - lambda_weight) * div
-            if score > best_score:
-                best_score = score
-                best_i = i
-        chosen.append(best_i)  # type: ignore
-        cand.remove(best_i)    # type: ignore
+        score = lambda_weight * rel - (1 - lambda_weight) * max_sim
+        score[taken] = -np.inf
+        best_i = int(np.argmax(score))  # first maximum, i.e. lowest index on ties
+        sims = vecs @ vecs[best_i]
+        if chosen:
+            np.maximum(max_sim, sims, out=max_sim)
+        else:
+            max_sim[:] = sims  # no diversity penalty before the first pick, then max over picks
+        chosen.append(best_i)
+        taken[best_i] = True
     chosen.sort()
     return chosen
 
@@ -179,38 +253,70 @@ def _format_structured(summary_body: str, names: List[str], dates: List[str], or
         "- (add any risks, ambiguities, or follow-ups here)"
     )
 
+_ABSTRACTIVE_SYSTEM = "You are a professional analyst. Write a clear, structured, and editable summary."
+_ABSTRACTIVE_INSTRUCTIONS = (
+    "Format sections as:\n"
+    "## Overview\n## Key Points\n## Dates\n## Entities\n## Risks / Open Questions\n\n"
+    "[DOCUMENT START]\n"
+)
+
 class SummaryAgent:
-    def __init__(self) -> None:
+    def __init__(self, embedder: Embedder | None = None) -> None:
         self.provider = (os.getenv("LLM_PROVIDER") or "").lower()
         self.openai_key = os.getenv("OPENAI_API_KEY")
-        self._client = None
-        if self.provider == "openai" and self.openai_key:
-            try:
-                from openai import OpenAI
-                self._client = OpenAI(api_key=self.openai_key)
-            except Exception:
-                self._client = None
-        self.embedder = HashedEmbeddings(dim=384)
+        self._client = get_openai_client()
+        self.embedder = embedder or HashedEmbeddings(dim=384)
+        self._extractive_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._extractive_lock = threading.Lock()
+        self._sentence_vecs = _SentenceVectorCache(self.embedder)
 
     def _extractive_mmr(self, text: str, target_words: int, seed: int) -> str:
         random.seed(seed)
+        # the selection itself doesn't depend on the seed, so (text, target) identifies the result
+        key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), target_words)
+        with self._extractive_lock:
+            out = self._extractive_cache.get(key)
+            if out is not None:
+                self._extractive_cache.move_to_end(key)
+                return out
+        out = self._extractive_mmr_uncached(text, target_words)
+        with self._extractive_lock:
+            self._extractive_cache[key] = out
+            while len(self._extractive_cache) > _EXTRACTIVE_CACHE_ITEMS:
+                self._extractive_cache.popitem(last=False)
+        return out
+
+    def _extractive_mmr_uncached(self, text: str, target_words: int) -> str:
         sents = _sentences(text)
         if not sents:
             return ""
 
         # Diverse top sentences via MMR
         k = max(5, min(len(sents), target_words // 20))
-        chosen_idx = _mmr_select(sents, k=k, embedder=self.embedder, lambda_weight=0.72)
+        chosen_idx = _mmr_select(sents, k=k, embedder=self._sentence_vecs, lambda_weight=0.72)
         chosen = [sents[i] for i in chosen_idx]
 
-        # Expand until target by appending additional sentences in order
-        out = " ".join(chosen)
+        # Expand until target by appending additional sentences in order.
+        # Word counts add up across the space-joined output; only sentences that make it into
+        # the output are tokenized (usually a short prefix), each at most once.
+        wcs: List[int | None] = [None] * len(sents)
+
+        def wc(j: int) -> int:
+            if wcs[j] is None:
+                wcs[j] = _wc(sents[j])
+            return wcs[j]
+
+        parts = list(chosen)
+        chosen_set = set(chosen)  # O(1) membership; same string-equality semantics as `in chosen`
+        count = sum(wc(j) for j in chosen_idx)
         i = 0
-        while _wc(out) < target_words and i < len(sents) * 2:
-            cand = sents[i % len(sents)]
-            if cand not in chosen:  # avoid duplicates
-                out += " " + cand
+        while count < target_words and i < len(sents) * 2:
+            j = i % len(sents)
+            if sents[j] not in chosen_set:  # avoid duplicates
+                parts.append(sents[j])
+                count += wc(j)
             i += 1
+        out = " ".join(parts)
 
         # Trim to ~target
         words = out.split()
@@ -222,25 +328,20 @@ class SummaryAgent:
     def _abstractive_llm(self, text: str, target_words: int, temperature: float, seed: int) -> str:
         if not self._client:
             return ""
-        sys_hint = (
-            f"You are a professional analyst. Seed={seed}. "
-            "Write a clear, structured, and editable summary."
-        )
-        user_prompt = (
-            f"Target length: ~{target_words} words.\n"
-            "Format sections as:\n"
-            "## Overview\n## Key Points\n## Dates\n## Entities\n## Risks / Open Questions\n\n"
-            "[DOCUMENT START]\n" + text + "\n[DOCUMENT END]"
-        )
+        # static prefix first (system + format instructions) so provider prompt caching can reuse it;
+        # per-request values (document, target length) go last and the seed is sent as an API param
+        user_prompt = _ABSTRACTIVE_INSTRUCTIONS + text + f"\n[DOCUMENT END]\n\nTarget length: ~{target_words} words."
         try:
-            resp = self._client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": sys_hint},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=max(0.0, min(1.0, temperature)),
-            )
+            with _LLM_SLOTS:
+                resp = self._client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": _ABSTRACTIVE_SYSTEM},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=max(0.0, min(1.0, temperature)),
+                    seed=seed,
+                )
             out = resp.choices[0].message.content.strip()
             # light trim
             w = out.split()
@@ -250,6 +351,19 @@ class SummaryAgent:
         except Exception:
             return ""
 
+    def _abstractive_map_reduce(self, chunks: List[str], target_words: int, temperature: float, seed: int) -> str:
+        windows = _windows(chunks, _MAP_WINDOW_CHARS)[:_MAP_MAX_WINDOWS]
+        if len(windows) <= 1:
+            return self._abstractive_llm(windows[0] if windows else "", target_words, temperature, seed)
+        # map: each window gets its share of the target (with headroom for the reduce step to cut from)
+        part_words = max(120, 2 * target_words // len(windows))
+        with ThreadPoolExecutor(max_workers=min(_MAX_CONCURRENCY, len(windows))) as pool:
+            parts = list(pool.map(lambda w: self._abstractive_llm(w, part_words, temperature, seed), windows))
+        if not all(parts):
+            return ""  # a failed window would leave a hole; fall back to extractive
+        # reduce: the window summaries, in document order, become the document
+        return self._abstractive_llm("\n\n".join(parts), target_words, temperature, seed)
+
     def summarize(
         self,
         chunks: List[str],
@@ -259,13 +373,13 @@ class SummaryAgent:
         seed: int = 42,
         entities: Tuple[List[str], List[str], List[str]] | None = None,  # (names, dates, orgs)
     ) -> str:
-        text = "\n".join(chunks)[:60000]
+        text = _join_capped(chunks, 60000)
         if not text.strip():
             return ""
 
         # Try LLM if requested
-        if mode == "abstractive":
-            out = self._abstractive_llm(text, target_words, temperature, seed)
+        if mode == "abstractive" and self._client:
+            out = self._abstractive_map_reduce(chunks, target_words, temperature, seed)
             if out:
                 return out
 
@@ -273,3 +387,10 @@ class SummaryAgent:
         body = self._extractive_mmr(text, target_words, seed)
         names, dates, orgs = (entities or ([], [], []))
         return _format_structured(body, names, dates, orgs)
+
+    def summarize_batch(self, docs: List[List[str]], **kwargs) -> List[str]:
+        """Summarize several chunk lists concurrently (bounded by LLM_MAX_CONCURRENCY); order is preserved."""
+        if len(docs) <= 1:
+            return [self.summarize(d, **kwargs) for d in docs]
+        with ThreadPoolExecutor(max_workers=max(1, min(_MAX_CONCURRENCY, len(docs)))) as pool:
+            return list(pool.map(lambda d: self.summarize(d, **kwargs), docs))
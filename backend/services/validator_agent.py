@@ -3,13 +3,24 @@ Simple validators for summaries and answers.
 Return a { ok: bool, score: float, messages: [str] } report.
 """
 import re
+from functools import lru_cache
 from typing import Dict, List
 
 WORD_RE = re.compile(r"\b\w+\b")
 
+@lru_cache(maxsize=1024)  # the same summary is re-validated on regenerations and cache hits
 def _word_count(text: str) -> int:
     return len(WORD_RE.findall(text or ""))
 
+def _lower_words(text: str) -> List[str]:
+    """[w.lower() for w in WORD_RE.findall(text)], lowercasing the text once instead of per word."""
+    low = text.lower()
+    # tokens line up when every char lowered 1:1 (chars keep their \w class when they do) and no
+    # capital sigma is present, whose lowercase depends on its neighbours (final ς)
+    if len(low) == len(text) and "Σ" not in text:
+        return WORD_RE.findall(low)
+    return [w.lower() for w in WORD_RE.findall(text)]  # e.g. "İ" lowers to two code points
+
 def validate_summary(summary: str, min_words: int = 150, max_words: int = 800) -> Dict:
     msgs: List[str] = []
     wc = _word_count(summary)
@@ -34,16 +45,15 @@ def validate_summary(summary: str, min_words: int = 150, max_words: int = 800) -
 
 def validate_answer(answer: str, contexts: List[str]) -> Dict:
     msgs: List[str] = []
-    wc = _word_count(answer)
+    ans_words = _lower_words(answer or "")
+    wc = len(ans_words)
     if wc == 0:
         msgs.append("Empty answer.")
         return {"ok": False, "score": 0.0, "messages": msgs, "word_count": wc}
 
     # Simple “uses context” heuristic: overlap with top-k context words
-    ctx_text = " ".join(contexts or [])
-    ctx_words = set(w.lower() for w in WORD_RE.findall(ctx_text))
-    ans_words = [w.lower() for w in WORD_RE.findall(answer)]
-    overlap = sum(1 for w in ans_words if w in ctx_words)
+    ctx_words = frozenset(_lower_words(" ".join(contexts or [])))
+    overlap = sum(w in ctx_words for w in ans_words)
     ratio = overlap / max(1, len(ans_words))
     if ratio < 0.15:
         msgs.append("Low overlap with retrieved context; answer may be hallucinated.")
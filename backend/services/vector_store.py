@@ -1,44 +1,137 @@
 """
 Vector store with optional pgvector backend.
+In memory, search is exact (brute force) until the store reaches VECTOR_ANN_MIN_ROWS
+rows; past that, if faiss is installed, an HNSW index over the same rows answers queries.
 """
 from __future__ import annotations
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+import atexit
 import os
 import numpy as np
 
-from .embeddings import HashedEmbeddings
+from .embeddings import Embedder, HashedEmbeddings
 
 DB_URL = os.getenv("DATABASE_URL")
+# below this many rows exact search is as fast as HNSW and needs no index upkeep
+ANN_MIN_ROWS = int(os.getenv("VECTOR_ANN_MIN_ROWS", "5000"))
+# Postgres connections per process, shared by every thread (one connection would serialize them)
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", "10"))
+# "sq8": HNSW over 8-bit scalar-quantized codes (4x less memory traffic), FP32 re-rank of top_k * 4
+ANN_QUANTIZE = os.getenv("VECTOR_ANN_QUANTIZE", "").lower()
+
+try:
+    import faiss  # optional: approximate nearest-neighbour search for large in-memory stores
+except ImportError:
+    faiss = None
+
+@lru_cache(maxsize=1)
+def _pgvector_adapter():
+    try:
+        from pgvector.psycopg import register_vector  # optional: binary vector adapter
+        return register_vector
+    except ImportError:
+        return None
+
+@lru_cache(maxsize=4)
+def _pg_pool(url: str):
+    """One connection pool per database URL for the whole process."""
+    from psycopg_pool import ConnectionPool
+    adapter = _pgvector_adapter()
+    pool = ConnectionPool(
+        url, min_size=1, max_size=PG_POOL_MAX, kwargs={"autocommit": True},
+        configure=adapter,  # per new connection: float32 arrays are sent as binary vectors
+        open=True,
+    )
+    atexit.register(pool.close)
+    return pool
 
 class VectorStore:
-    def __init__(self, dim: int = 384) -> None:
+    def __init__(self, dim: int = 384, embedder: Embedder | None = None, batch_size: int = 64) -> None:
         self.dim = dim
-        self.embedder = HashedEmbeddings(dim=dim)
+        self.embedder = embedder or HashedEmbeddings(dim=dim)
+        self.batch_size = max(1, batch_size)
         if DB_URL:
             self._init_pg()
         else:
             self._data: list[tuple[str, int, np.ndarray, str]] = []  # (doc_id, chunk_idx, vec, content)
+            self._ann = None  # HNSW index over _data, rebuilt lazily after upserts (HNSW can't delete)
+            self._mat = None  # (M, dim) float32 matrix of _data's vectors, rebuilt lazily after upserts
 
     # ---------- In-memory ----------
-    def _upsert_memory(self, document_id: str, chunks: List[str], vecs: np.ndarray) -> None:
-        # Remove old entries for this doc
-        self._data = [row for row in self._data if row[0] != document_id]
-        for i, (c, v) in enumerate(zip(chunks, vecs)):
-            self._data.append((document_id, i, v, c))
+    def _upsert_memory(self, docs: Dict[str, Tuple[List[str], np.ndarray]]) -> None:
+        # Remove old entries for these docs; the new list is swapped in whole
+        data = [row for row in self._data if row[0] not in docs]
+        for document_id, (chunks, vecs) in docs.items():
+            data.extend((document_id, i, v, c) for i, (c, v) in enumerate(zip(chunks, vecs)))
+        self._data = data
+        self._ann = None
+        self._mat = None
+
+    def _matrix(self):
+        data = self._data  # matrix and the rows it was built from travel together
+        mat = self._mat
+        # an upsert racing a build can leave a matrix of older rows behind; only reuse the current one
+        if mat is None or mat[1] is not data:
+            m = np.stack([row[2] for row in data]).astype(np.float32, copy=False) if data else np.empty((0, self.dim), np.float32)
+            mat = (m, data)
+            if self._data is data:  # don't publish over an upsert that landed mid-build
+                self._mat = mat
+        return mat
+
+    def _ann_index(self):
+        ann = self._ann
+        # same staleness rule as _matrix: an index counts only while it covers the current rows
+        if ann is None or ann[1] is not self._data:
+            mat, data = self._matrix()  # index and the rows it was built from travel together
+            mat = np.ascontiguousarray(mat)
+            if ANN_QUANTIZE == "sq8":
+                index = faiss.IndexHNSWSQ(self.dim, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+                index.train(mat)  # learns per-dimension ranges for the 8-bit codes
+            else:
+                index = faiss.IndexHNSWFlat(self.dim, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = 64
+            index.add(mat)
+            ann = (index, data)
+            if self._data is data:  # don't publish over an upsert that landed mid-build
+                self._ann = ann
+        return ann
+
+    def _search_ann(self, qvec: np.ndarray, top_k: int) -> List[Tuple[str, int, float, str]]:
+        # rows are L2-normalized, so inner product == cosine, same score as the exact path
+        index, data = self._ann_index()
+        q = np.ascontiguousarray(qvec, dtype=np.float32).reshape(1, -1)
+        if ANN_QUANTIZE != "sq8":
+            scores, ids = index.search(q, top_k)
+            return [(data[i][0], data[i][1], float(sc), data[i][3]) for sc, i in zip(scores[0], ids[0]) if i >= 0]
+        # quantized scores are approximate: over-fetch, then re-rank candidates with the FP32 vectors
+        _, ids = index.search(q, top_k * 4)
+        cand = [int(i) for i in ids[0] if i >= 0]
+        exact = np.stack([data[i][2] for i in cand]) @ q[0] if cand else np.empty(0, dtype=np.float32)
+        order = np.argsort(-exact, kind="stable")[:top_k]
+        return [(data[cand[j]][0], data[cand[j]][1], float(exact[j]), data[cand[j]][3]) for j in order]
 
     def _search_memory(self, qvec: np.ndarray, top_k: int) -> List[Tuple[str, int, float, str]]:
-        scores = []
-        for doc_id, idx, v, c in self._data:
-            score = float(np.dot(qvec, v))  # cosine-ish (vectors normalized)
-            scores.append((doc_id, idx, score, c))
-        scores.sort(key=lambda x: x[2], reverse=True)
-        return scores[:top_k]
+        if faiss is not None and len(self._data) >= ANN_MIN_ROWS:
+            return self._search_ann(qvec, top_k)
+        mat, data = self._matrix()
+        k = min(top_k, len(data))
+        if k <= 0:
+            return []
+        scores = mat @ np.asarray(qvec, dtype=np.float32)  # cosine-ish (vectors normalized)
+        # partial selection: everything scoring at least the k-th best, then a stable sort so
+        # equal scores keep row order (same result as a full sort + slice)
+        cand = np.flatnonzero(scores >= np.partition(scores, len(scores) - k)[len(scores) - k]) if k < len(scores) else np.arange(k)
+        top = cand[np.argsort(-scores[cand], kind="stable")][:k]
+        return [(data[i][0], data[i][1], float(scores[i]), data[i][3]) for i in top]
 
     # ---------- Postgres+pgvector ----------
     def _init_pg(self) -> None:
         import psycopg
-        self.conn = psycopg.connect(DB_URL, autocommit=True)
-        with self.conn.cursor() as cur:
+        # schema setup on a one-off connection: the pool's connections can only register the
+        # vector type once the extension exists
+        with psycopg.connect(DB_URL, autocommit=True) as conn, conn.cursor() as cur:
             cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
             cur.execute(f"""
             CREATE TABLE IF NOT EXISTS doc_embeddings (
@@ -49,42 +142,101 @@ class VectorStore:
                 content TEXT NOT NULL
             );
             """)
-            # Optional: IVFFlat index requires `SET enable_seqscan = off` for full benefit in some cases
             try:
                 cur.execute("CREATE INDEX IF NOT EXISTS idx_doc ON doc_embeddings(doc_id);")
-                cur.execute("CREATE INDEX IF NOT EXISTS idx_embed ON doc_embeddings USING ivfflat (embedding vector_cosine_ops);")
             except Exception:
-                pass  # index create can fail if PRAMs not set; safe to continue
-
-    def _upsert_pg(self, document_id: str, chunks: List[str], vecs: np.ndarray) -> None:
-        with self.conn.cursor() as cur:
-            cur.execute("DELETE FROM doc_embeddings WHERE doc_id=%s;", (document_id,))
-            for i, (c, v) in enumerate(zip(chunks, vecs)):
-                # psycopg 3 can adapt Python lists to pgvector with the extension installed
+                pass
+            # HNSW (pgvector >= 0.5): better recall/latency than IVFFlat, no lists/probes tuning,
+            # and it can be built on an empty table
+            try:
                 cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_embed_hnsw ON doc_embeddings "
+                    "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);"
+                )
+                cur.execute("DROP INDEX IF EXISTS idx_embed;")  # IVFFlat index from earlier versions
+            except Exception:
+                # older pgvector: IVFFlat requires `SET enable_seqscan = off` for full benefit in some cases
+                try:
+                    cur.execute("CREATE INDEX IF NOT EXISTS idx_embed ON doc_embeddings USING ivfflat (embedding vector_cosine_ops);")
+                except Exception:
+                    pass  # index create can fail if PRAMs not set; safe to continue
+        self._pool = _pg_pool(DB_URL)
+        # without the adapter, lists go as float8[] and are cast to vector server-side
+        self._pg_binary = _pgvector_adapter() is not None
+
+    def _pg_param(self, v: np.ndarray):
+        return np.asarray(v, dtype=np.float32) if self._pg_binary else v.tolist()
+
+    def _upsert_pg(self, docs: Dict[str, Tuple[List[str], np.ndarray]]) -> None:
+        # delete + insert in one transaction so searches never see a document half-replaced
+        with self._pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
+            for document_id, (chunks, vecs) in docs.items():
+                cur.execute("DELETE FROM doc_embeddings WHERE doc_id=%s;", (document_id,))
+                # one prepared statement for every row; psycopg 3 pipelines executemany, so this is
+                # not a round-trip per chunk
+                cur.executemany(
                     "INSERT INTO doc_embeddings (doc_id, chunk_idx, embedding, content) VALUES (%s,%s,%s,%s);",
-                    (document_id, i, v.tolist(), c),
+                    [(document_id, i, v, c) for i, (c, v) in enumerate(zip(chunks, vecs if self._pg_binary else vecs.tolist()))],
                 )
 
     def _search_pg(self, qvec: np.ndarray, top_k: int) -> List[Tuple[str, int, float, str]]:
-        with self.conn.cursor() as cur:
+        q = self._pg_param(qvec)
+        with self._pool.connection() as conn, conn.cursor() as cur:
             cur.execute(
-                "SELECT doc_id, chunk_idx, 1 - (embedding <=> %s) AS score, content "
-                "FROM doc_embeddings ORDER BY embedding <=> %s ASC LIMIT %s;",
-                (qvec.tolist(), qvec.tolist(), top_k),
+                "SELECT doc_id, chunk_idx, 1 - (embedding <=> %s::vector) AS score, content "
+                "FROM doc_embeddings ORDER BY embedding <=> %s::vector ASC LIMIT %s;",
+                (q, q, top_k),
             )
             return [(r[0], r[1], float(r[2]), r[3]) for r in cur.fetchall()]
 
     # ---------- Public API ----------
-    def upsert_document(self, document_id: str, chunks: List[str]) -> None:
-        vecs = self.embedder.embed_texts(chunks)
+    def _embed_batched(self, chunks: List[str], batch_size: int | None = None) -> np.ndarray:
+        """embed_texts over fixed-size slices written into one preallocated array (bounds peak memory)."""
+        bs = batch_size or self.batch_size
+        if len(chunks) <= bs:
+            return self.embedder.embed_texts(chunks)
+        vecs = np.empty((len(chunks), self.dim), dtype=np.float32)
+        for start in range(0, len(chunks), bs):
+            vecs[start:start + bs] = self.embedder.embed_texts(chunks[start:start + bs])
+        return vecs
+
+    def _embed_reusing(self, document_id: str, chunks: List[str], batch_size: int | None = None) -> np.ndarray:
+        """Embed chunks, reusing in-memory vectors for chunks this document already had."""
+        known = {c: v for doc_id, _, v, c in self._data if doc_id == document_id}
+        if not known:
+            return self._embed_batched(chunks, batch_size)
+        vecs = np.empty((len(chunks), self.dim), dtype=np.float32)
+        todo = [i for i, c in enumerate(chunks) if c not in known]
+        for i, c in enumerate(chunks):
+            if c in known:
+                vecs[i] = known[c]
+        if todo:
+            vecs[todo] = self._embed_batched([chunks[i] for i in todo], batch_size)
+        return vecs
+
+    def upsert_document(self, document_id: str, chunks: Iterable[str], batch_size: int | None = None) -> None:
+        chunks = list(chunks)  # materialize so chunks are embedded in batches, never one by one
+        if DB_URL:
+            self._upsert_pg({document_id: (chunks, self._embed_batched(chunks, batch_size))})
+        else:
+            self._upsert_memory({document_id: (chunks, self._embed_reusing(document_id, chunks, batch_size))})
+
+    def bulk_upsert(self, docs: Dict[str, Iterable[str]], batch_size: int | None = None) -> None:
+        """Upsert several documents at once: chunks of small documents share embedding batches,
+        and on Postgres every document is replaced in one transaction."""
+        docs = {doc_id: list(chunks) for doc_id, chunks in docs.items()}
         if DB_URL:
-            self._upsert_pg(document_id, chunks, vecs)
+            vecs = self._embed_batched([c for chunks in docs.values() for c in chunks], batch_size)
+            rows, start = {}, 0
+            for doc_id, chunks in docs.items():
+                rows[doc_id] = (chunks, vecs[start:start + len(chunks)])
+                start += len(chunks)
+            self._upsert_pg(rows)
         else:
-            self._upsert_memory(document_id, chunks, vecs)
+            self._upsert_memory({d: (chunks, self._embed_reusing(d, chunks, batch_size)) for d, chunks in docs.items()})
 
     def search(self, query_text: str, top_k: int = 5) -> List[Tuple[str, int, float, str]]:
-        qvec = self.embedder.embed_texts([query_text])[0]
+        qvec = self.embedder.embed_query(query_text)
         if DB_URL:
             return self._search_pg(qvec, top_k)
         return self._search_memory(qvec, top_k)
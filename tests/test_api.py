@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from fastapi.testclient import TestClient
 from backend.api.main import app
 
@@ -7,3 +9,71 @@ def test_health():
     r = client.get("/health")
     assert r.status_code == 200
     assert r.json()["ok"] is True
+
+def test_document_bundle(tmp_path):
+    from backend.api.main import get_orchestrator
+    path = tmp_path / "notes.txt"
+    path.write_text("Alice met Bob in Paris.")
+    doc_id = get_orchestrator().register_document(filename="notes.txt", saved_path=str(path))
+
+    r = client.get(f"/documents/{doc_id}/bundle")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["summary"] == {"document_id": doc_id, "status": "pending", "summary": None}
+    assert body["entities"]["status"] == "pending"
+    assert body["versions"] == []
+
+    assert client.get("/documents/no-such-id/bundle").status_code == 404
+
+def _upload_dir(tmp_path, monkeypatch):
+    import backend.api.main as api
+    monkeypatch.setattr(api, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+def test_upload_streams_file_to_disk(tmp_path, monkeypatch):
+    from backend.api.main import get_orchestrator
+    _upload_dir(tmp_path, monkeypatch)
+    bodies = [b"Alice met Bob in Paris.", b"Carol met Dave in Rome."]
+    # same client file name twice: the second upload must not overwrite the first one's file
+    ids = []
+    for body in bodies:
+        r = client.post("/documents", files={"file": ("notes.txt", body, "text/plain")})
+        assert r.status_code == 200
+        assert r.json()["filename"] == "notes.txt"
+        ids.append(r.json()["document_id"])
+    docs = [get_orchestrator().store.get(doc_id) for doc_id in ids]
+    assert [d.filename for d in docs] == ["notes.txt", "notes.txt"]
+    assert docs[0].path != docs[1].path
+    assert [Path(d.path).read_bytes() for d in docs] == bodies
+    assert all(Path(d.path).parent == tmp_path and Path(d.path).suffix == ".txt" for d in docs)
+
+def test_upload_too_large(tmp_path, monkeypatch):
+    from backend.api.main import settings
+    upload_dir = _upload_dir(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "max_upload_bytes", 10)
+    r = client.post("/documents", files={"file": ("big.txt", b"x" * 100, "text/plain")})
+    assert r.status_code == 413
+    assert list(upload_dir.iterdir()) == []  # nothing left behind
+
+def test_upload_unsupported_type(tmp_path, monkeypatch):
+    upload_dir = _upload_dir(tmp_path, monkeypatch)
+    r = client.post("/documents", files={"file": ("tool.exe", b"MZ", "application/octet-stream")})
+    assert r.status_code == 415
+    assert list(upload_dir.iterdir()) == []
+
+def test_upload_missing_file_field(tmp_path, monkeypatch):
+    _upload_dir(tmp_path, monkeypatch)
+    r = client.post("/documents", files={"other": ("notes.txt", b"hi", "text/plain")})
+    assert r.status_code == 422
+    r = client.post("/documents", data={"file": "not a file"})  # form-urlencoded, not multipart
+    assert r.status_code == 422
+
+def test_upload_malformed_body(tmp_path, monkeypatch):
+    upload_dir = _upload_dir(tmp_path, monkeypatch)
+    r = client.post(
+        "/documents",
+        content=b"--b0undary\r\nthis is not a header block\r\n\r\n",
+        headers={"content-type": "multipart/form-data; boundary=b0undary"},
+    )
+    assert r.status_code == 400
+    assert list(upload_dir.iterdir()) == []
@@ -0,0 +1,45 @@
+import random
+
+from backend.services.chunker import chunk_offsets, chunk_text, chunk_text_iter, chunk_text_stream
+
+def _reference_chunk_text(text, max_chars=800, overlap=120):
+    """The original loop-based chunk_text, kept verbatim as the oracle."""
+    text = text.strip()
+    if not text:
+        return []
+    chunks = []
+    start = 0
+    n = len(text)
+    while start < n:
+        end = min(start + max_chars, n)
+        chunk = text[start:end]
+        chunks.append(chunk)
+        if end >= n:
+            break
+        start = end - overlap if end - overlap > start else end
+    return chunks
+
+def _random_pieces(rng):
+    alphabet = "ab cd\n\t."
+    pieces = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60))) for _ in range(rng.randint(0, 12))]
+    if rng.random() < 0.3:
+        pieces.insert(0, "  \n ")  # leading whitespace / empty pages
+    if rng.random() < 0.3:
+        pieces.append(" \n  ")
+    return pieces
+
+def test_chunkers_match_the_original_loop():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        pieces = _random_pieces(rng)
+        max_chars = rng.randint(1, 40)
+        overlap = rng.randint(0, 45)  # includes overlap >= max_chars
+        text = "\n".join(pieces)
+        expected = _reference_chunk_text(text, max_chars, overlap)
+
+        assert chunk_text(text, max_chars, overlap) == expected
+        assert list(chunk_text_iter(text, max_chars, overlap)) == expected
+        assert list(chunk_text_stream(pieces, max_chars, overlap)) == expected
+
+        stripped = text.strip()
+        assert [stripped[s:e] for s, e in chunk_offsets(len(stripped), max_chars, overlap)] == expected
@@ -0,0 +1,54 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.services.coalescer import RequestCoalescer
+
+N = 8
+
+def _run_concurrently(flights, fn):
+    """Start N callers on one key; release the leader's fn only once the other N-1 are waiting on it."""
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return fn()
+
+    with ThreadPoolExecutor(N) as pool:
+        futs = [pool.submit(flights.run, "k", compute) for _ in range(N)]
+        deadline = time.time() + 5
+        while flights.stats["coalesced"] < N - 1 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        outcomes = []
+        for f in futs:
+            try:
+                outcomes.append(f.result())
+            except Exception as e:
+                outcomes.append(e)
+    return calls, outcomes
+
+def test_concurrent_callers_share_one_call():
+    flights = RequestCoalescer()
+    calls, outcomes = _run_concurrently(flights, lambda: "summary")
+    assert len(calls) == 1
+    assert outcomes == ["summary"] * N
+    assert flights.stats == {"calls": 1, "coalesced": N - 1}
+    assert flights.run("k", lambda: "again") == "again"  # nothing left in flight
+
+def test_exception_reaches_every_waiter():
+    flights = RequestCoalescer()
+
+    def boom():
+        raise RuntimeError("summarizer failed")
+
+    calls, outcomes = _run_concurrently(flights, boom)
+    assert len(calls) == 1
+    assert len(outcomes) == N
+    assert all(isinstance(e, RuntimeError) and str(e) == "summarizer failed" for e in outcomes)
+    with pytest.raises(RuntimeError):
+        flights.run("k", boom)
@@ -4,3 +4,13 @@ def test_entity_extraction_basic():
     text = "Alice met Bob on 2023-05-01 in Paris."
     ents = extract_entities(text)
     assert "Alice" in ents.get("names", []) or "Bob" in ents.get("names", [])
+
+def test_org_suffix_hint_never_skips_a_match():
+    from backend.services.entity_extraction import ORG_SUFFIX_HINT, ORG_SUFFIX_PAT
+    samples = ["Acme Inc", "Acme Inc.", "Globex Sarl", "Initech LLC reported", "Umbrella Co. Ltd",
+               "Inc Acme", "Acme LLCs", "Coinbase", "Acme\tGmbH", "Stark Corporation", "Sarl Acme"]
+    for text in samples:
+        if ORG_SUFFIX_PAT.search(text):
+            assert ORG_SUFFIX_HINT.search(text), text
+    assert ORG_SUFFIX_HINT.search("Acme Inc") and ORG_SUFFIX_HINT.search("Globex Sarl")
+    assert not ORG_SUFFIX_HINT.search("Acme LLCs") and not ORG_SUFFIX_HINT.search("Coinbase")
@@ -0,0 +1,9 @@
+from backend.services.llm_cache import LLMCache
+
+def test_llm_cache_roundtrip(tmp_path):
+    cache = LLMCache(tmp_path)
+    key = cache.cache_key(text="doc", mode="extractive_mmr", target_words=200, temperature=0.2, seed=None)
+    assert cache.get(key) is None
+    cache.set(key, {"summary": "s", "validation": {"ok": True}})
+    assert LLMCache(tmp_path).get(key)["summary"] == "s"  # served from disk
+    assert cache.cache_key(text="doc", mode="abstractive", target_words=200, temperature=0.7, seed=None) is None
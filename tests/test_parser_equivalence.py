@@ -0,0 +1,63 @@
+import random
+from pathlib import Path
+
+import docx
+from docx.enum.text import WD_BREAK
+from docx.oxml import parse_xml
+
+from backend.services.parser import _read_text, parse_docx
+
+_HYPERLINK = (
+    '<w:hyperlink xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:r><w:t>linked</w:t></w:r><w:r><w:tab/><w:t xml:space=\"preserve\"> text </w:t></w:r>"
+    "</w:hyperlink>"
+)
+
+def _build_docx(path):
+    doc = docx.Document()
+    doc.add_paragraph("Plain paragraph.")
+    doc.add_paragraph("")  # empty paragraphs keep their line
+    p = doc.add_paragraph("before tab")
+    p.add_run().add_tab()
+    p.add_run("after tab")
+    p = doc.add_paragraph("line one")
+    p.add_run().add_break()  # textWrapping -> "\n"
+    p.add_run("line two")
+    p.add_run().add_break(WD_BREAK.PAGE)  # page/column breaks are not text
+    p.add_run("next page")
+    p = doc.add_paragraph("see ")
+    p._p.append(parse_xml(_HYPERLINK))
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = "in a table, not a body paragraph"
+    doc.add_paragraph("   ")
+    doc.add_paragraph("Ünïcödé — last")
+    doc.save(path)
+
+def test_docx_iterparse_matches_python_docx(tmp_path):
+    path = tmp_path / "sample.docx"
+    _build_docx(path)
+    expected = "\n".join(p.text for p in docx.Document(str(path)).paragraphs)
+    assert "\t" in expected and "line one\nline two" in expected  # the fixture exercises what it claims to
+    assert parse_docx(str(path)) == expected
+
+def _reference_read_text(path):
+    return Path(path).read_text(encoding="utf-8", errors="ignore")
+
+def test_read_text_matches_read_text(tmp_path):
+    path = tmp_path / "input.txt"
+    cases = [
+        b"",
+        b"unix\nlines\n",
+        b"windows\r\nlines\r\n",
+        b"old mac\rlines\r",
+        b"mixed\r\n\r\r\n\n\rend",
+        b"bad \xff\xfe bytes \xc3( and a cut-off \xe2\x82",
+        "café — €".encode("utf-8") + b"\r\n",
+        b"\r",
+    ]
+    rng = random.Random(7)
+    alphabet = [b"a", b"\r", b"\n", b"\r\n", b"\xc3\xa9", b"\xff", b"\xe2\x82", b"\x80"]
+    cases += [b"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40))) for _ in range(300)]
+    for data in cases:
+        path.write_bytes(data)
+        assert _read_text(str(path)) == _reference_read_text(path), data
@@ -7,3 +7,75 @@ def test_qa_fallback():
     qa = QAAgent(vs)
     result = qa.answer(question="What is Python?")
     assert "Python" in result["answer"]
+
+def test_qa_semantic_cache():
+    from backend.services.qa_cache import SemanticQACache
+    cache = SemanticQACache(VectorStore(dim=64).embedder)
+    cache.add("What is Python?", ["doc1"], {"answer": "A language."})
+    assert cache.lookup("what is python?", ["doc1"])["answer"] == "A language."
+    assert cache.lookup("what is python?", ["doc2"]) is None
+    assert cache.lookup("  What is   PYTHON? ", ["doc1"])["answer"] == "A language."
+    assert cache.stats["exact_hits"] == 2
+
+def test_qa_semantic_cache_one_token_apart_is_a_miss():
+    from backend.services.qa_cache import SemanticQACache
+    cache = SemanticQACache(VectorStore(dim=384).embedder)
+    q2021 = "how much revenue did acme corp report in its annual filing for fiscal 2021"
+    q2022 = q2021.replace("2021", "2022")
+    # 13 of 14 distinct tokens shared: cosine ~0.93, which a 0.92 threshold would have served
+    assert float(cache._embed(q2021) @ cache._embed(q2022)) > 0.92
+    cache.add(q2021, ["doc1"], {"answer": "$1M"})
+    assert cache.lookup(q2022, ["doc1"]) is None
+    assert cache.lookup("for fiscal 2021 " + q2021.replace(" for fiscal 2021", ""), ["doc1"])["answer"] == "$1M"  # reordered
+
+def test_qa_semantic_cache_needs_the_same_content_words():
+    from backend.services.qa_cache import SemanticQACache
+    cache = SemanticQACache(VectorStore(dim=384).embedder)
+    q2021 = "what was the total revenue reported by the company in the annual report for 2021"
+    q2022 = q2021.replace("2021", "2022")
+    # repeated words push the one-token-apart pair past even the 0.95 threshold
+    assert float(cache._embed(q2021) @ cache._embed(q2022)) >= cache.threshold
+    cache.add(q2021, ["doc1"], {"answer": "$1M"})
+    assert cache.lookup(q2022, ["doc1"]) is None
+    assert cache.lookup("please " + q2021, ["doc1"])["answer"] == "$1M"  # filler words don't matter
+
+def test_qa_stream_matches_answer():
+    vs = VectorStore(dim=10)
+    vs.upsert_document("doc1", ["This is about Python programming."])
+    qa = QAAgent(vs)
+    *deltas, result = qa.answer_stream(question="What is Python?")
+    assert "".join(deltas) == result["answer"] == qa.answer(question="What is Python?")["answer"]
+
+class _BrokenStream:
+    """Chat client whose streamed completion dies after two pieces."""
+
+    class _Chunk:
+        def __init__(self, text):
+            delta = type("Delta", (), {"content": text})()
+            self.choices = [type("Choice", (), {"delta": delta})()]
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        assert kwargs.get("stream")
+        yield self._Chunk("Python is ")
+        yield self._Chunk("a programming")
+        raise ConnectionError("stream reset")
+
+def test_qa_stream_interrupted_is_reported_not_cached():
+    from backend.services.document_store import DocumentStore
+    from backend.services.orchestrator import Orchestrator
+    orch = Orchestrator(DocumentStore())
+    orch.vstore.upsert_document("doc1", ["This is about Python programming."])
+    orch.qa._client = _BrokenStream()
+
+    *deltas, result = orch.qa.answer_stream(question="What is Python?")
+    assert "".join(deltas) == "Python is a programming"
+    assert result["error"] == "llm_stream_interrupted"
+
+    events = list(orch.stream_answer(question="What is Python?", document_ids=["doc1"]))
+    assert [e["delta"] for e in events[:-1]] == ["Python is ", "a programming"]
+    assert events[-1]["done"] is False and events[-1]["error"] == "llm_stream_interrupted"
+    assert orch.qa_cache.lookup("What is Python?", ["doc1"]) is None
@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+import time
+
+from backend.services.sqlite_store import SQLiteDocumentStore
+
+def test_only_one_worker_claims_a_document(tmp_path):
+    db = tmp_path / "docs.db"
+    doc_id = SQLiteDocumentStore(db).add_document("a.txt", "/tmp/a.txt")
+
+    # one store per "worker process", all racing on the same file
+    workers = [SQLiteDocumentStore(db) for _ in range(8)]
+    barrier = threading.Barrier(len(workers))
+    results = []
+
+    def claim(store):
+        barrier.wait()
+        results.append(store.claim_processing(doc_id))
+
+    threads = [threading.Thread(target=claim, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == [False] * 7 + [True]
+    assert workers[0].claim_processing(doc_id) is False  # a later claim loses too
+    assert workers[0].get(doc_id).status == "processing"
+
+def test_stale_processing_is_reclaimed(tmp_path):
+    db = tmp_path / "docs.db"
+    store = SQLiteDocumentStore(db)
+    doc_id = store.add_document("a.txt", "/tmp/a.txt")
+    assert store.claim_processing(doc_id) is True
+    assert store.claim_processing(doc_id, stale_after_s=900) is False
+
+    # the worker that claimed it died an hour ago
+    with sqlite3.connect(str(db)) as conn:
+        conn.execute("UPDATE documents SET processing_since=? WHERE id=?;", (time.time() - 3600, doc_id))
+    assert store.claim_processing(doc_id, stale_after_s=900) is True
+    assert store.get(doc_id).processing_since > time.time() - 60  # the reclaim restarts the clock
+
+    store.set_summary(doc_id, "done")
+    assert store.claim_processing(doc_id, stale_after_s=0) is False  # ready documents are never claimed
+
+def test_summary_versions_and_rollback_round_trip(tmp_path):
+    db = tmp_path / "docs.db"
+    store = SQLiteDocumentStore(db)
+    doc_id = store.add_document("a.txt", "/tmp/a.txt")
+
+    assert store.push_summary_version(doc_id, "first", note="initial", validation={"word_count": 1}) == 0
+    assert store.push_summary_version(doc_id, "second", note="regenerate") == 1
+    assert store.get(doc_id).summary == "second"
+
+    assert store.rollback_summary(doc_id, 0) is True
+    assert store.rollback_summary(doc_id, 99) is False
+    assert store.push_summary_version("no-such-id", "x") == -1
+
+    # history is linear and survives reopening the file
+    reopened = SQLiteDocumentStore(db)
+    record = reopened.get(doc_id)
+    assert (record.summary, record.status) == ("first", "ready")
+    versions = reopened.list_summary_versions(doc_id)
+    assert [v.content for v in versions] == ["first", "second", "first"]
+    assert [v.note for v in versions] == ["initial", "regenerate", "rollback_to_0"]
+    assert versions[2].validation == {"word_count": 1}
+    view = reopened.list_versions_view(doc_id)
+    assert [(row["index"], row["word_count"]) for row in view] == [(0, 1), (1, None), (2, 1)]
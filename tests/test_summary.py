@@ -1,4 +1,6 @@
-from backend.services.summary_agent import SummaryAgent
+import numpy as np
+
+from backend.services.summary_agent import SummaryAgent, _mmr_select
 
 def test_summary_not_empty():
     agent = SummaryAgent()
@@ -7,3 +9,56 @@ def test_summary_not_empty():
     # assert len(summary.split()) >= 50
     assert len(summary.split()) > 10
 
+
+def test_summarize_batch_preserves_order():
+    agent = SummaryAgent()
+    docs = [["Alpha beta gamma. Delta epsilon."], ["Zeta eta theta. Iota kappa."]]
+    out = agent.summarize_batch(docs, target_words=50)
+    assert out == [agent.summarize(d, target_words=50) for d in docs]
+
+
+def _reference_mmr_select(vecs, k, lambda_weight):
+    """The original per-candidate MMR loop, kept as the oracle for the vectorized _mmr_select."""
+    centroid = np.mean(vecs, axis=0)
+    rel = vecs @ centroid
+    chosen = []
+    cand = set(range(len(vecs)))
+    while len(chosen) < min(k, len(vecs)):
+        best_i = None
+        best_score = -1e9
+        for i in cand:
+            div = 0.0
+            if chosen:
+                div = max(float(vecs[i] @ vecs[j]) for j in chosen)
+            score = lambda_weight * float(rel[i]) - (1 - lambda_weight) * div
+            if score > best_score:
+                best_score = score
+                best_i = i
+        chosen.append(best_i)
+        cand.remove(best_i)
+    chosen.sort()
+    return chosen
+
+
+class _FixedVectors:
+    """Embedder stand-in: sentence "s<i>" maps to row i of a fixed matrix."""
+
+    def __init__(self, vecs):
+        self.vecs = vecs
+        self.dim = vecs.shape[1]
+
+    def embed_texts(self, texts):
+        return self.vecs[[int(t[1:]) for t in texts]]
+
+
+def test_mmr_select_matches_original_loop():
+    rng = np.random.default_rng(42)
+    for _ in range(200):
+        n, dim = int(rng.integers(1, 40)), int(rng.integers(2, 16))
+        vecs = rng.standard_normal((n, dim)).astype(np.float32)
+        if n > 3:
+            vecs[rng.integers(0, n, 2)] = vecs[0]  # duplicate sentences: exact score ties
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        k, lam = int(rng.integers(1, n + 3)), float(rng.uniform(0.3, 0.9))
+        sents = [f"s{i}" for i in range(n)]
+        assert _mmr_select(sents, k, _FixedVectors(vecs), lam) == _reference_mmr_select(vecs, k, lam)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from backend.services.vector_store import VectorStore
+
+def _reference_search(rows, qvec, top_k):
+    """The original in-memory search: score every row, full sort, slice."""
+    scores = [(doc_id, idx, float(np.dot(qvec, v)), c) for doc_id, idx, v, c in rows]
+    scores.sort(key=lambda x: x[2], reverse=True)
+    return scores[:top_k]
+
+def test_memory_search_matches_full_sort():
+    rng = np.random.default_rng(7)
+    for _ in range(100):
+        dim = 8
+        store = VectorStore(dim=dim)
+        docs = {}
+        for d in range(int(rng.integers(1, 5))):
+            n = int(rng.integers(0, 30))
+            vecs = rng.standard_normal((n, dim)).astype(np.float32)
+            if n > 2:
+                vecs[1] = vecs[0]  # duplicate chunks: exact score ties must keep row order
+            vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-9)
+            docs[f"doc{d}"] = ([f"doc{d}-chunk{i}" for i in range(n)], vecs)
+        store._upsert_memory(docs)
+        qvec = rng.standard_normal(dim).astype(np.float32)
+        qvec /= np.linalg.norm(qvec)
+
+        for top_k in (1, 3, 5, len(store._data), len(store._data) + 4):
+            got = store._search_memory(qvec, top_k)
+            expected = _reference_search(store._data, qvec, top_k)
+            assert [(d, i, c) for d, i, _, c in got] == [(d, i, c) for d, i, _, c in expected]
+            assert [s for *_, s, _ in got] == pytest.approx([s for *_, s, _ in expected], abs=1e-6)
+
+def test_upsert_during_matrix_build_is_not_masked():
+    store = VectorStore(dim=4)
+    unit = np.eye(4, dtype=np.float32)
+    store._upsert_memory({"old": (["old chunk"], unit[:1])})
+
+    class _UpsertWhileIterating(list):
+        fired = False
+
+        def __iter__(self):
+            if not _UpsertWhileIterating.fired:  # first pass is the matrix build
+                _UpsertWhileIterating.fired = True
+                store._upsert_memory({"new": (["new chunk"], unit[1:2])})
+            return super().__iter__()
+
+    store._data = _UpsertWhileIterating(store._data)
+    store._mat = None
+    mat, rows = store._matrix()  # built from the rows it started with
+    assert [r[0] for r in rows] == ["old"]
+
+    hits = store._search_memory(unit[1], top_k=2)
+    assert hits[0][0] == "new" and hits[0][2] == pytest.approx(1.0)
@@ -2,10 +2,88 @@ import streamlit as st
 import requests
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+from urllib3.util.retry import Retry
 
 API_BASE = f"http://{os.getenv('API_HOST','127.0.0.1')}:{os.getenv('API_PORT','8000')}"
+# seconds a fetched versions list is reused across reruns (background ingest adds versions too)
+VERSIONS_TTL_S = 30
+VERSIONS_PAGE_SIZE = 10
+
+@st.cache_resource(show_spinner=False)
+def api_session() -> requests.Session:
+    """One keep-alive session for every rerun, instead of a new connection per API call."""
+    s = requests.Session()
+    # connect errors are retried for any method (the request never reached the API, POSTs included);
+    # gateway-error retries apply to idempotent methods only. Once retries run out, hand back the last
+    # response rather than raising, so callers keep their own status handling.
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+@st.cache_resource(show_spinner=False)
+def api_pool() -> ThreadPoolExecutor:
+    """Background threads for API calls that can overlap with the rest of a rerun."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="ui-api")
+
+def preloaded_json(fut):
+    """JSON body of a background GET, or None if it failed (the buttons can still fetch it)."""
+    if fut is None:
+        return None
+    try:
+        r = fut.result()
+    except Exception:
+        return None
+    return r.json() if r.status_code == 200 else None
+
+class MultipartFile:
+    """A one-file multipart/form-data body, sent as slices of the uploader's buffer.
+
+    requests' files= encoding builds the whole body in memory (and copies it once more); this
+    produces the same bytes without holding a second copy of the file. __len__ gives requests a
+    Content-Length, so the body is not sent chunked.
+    """
+
+    def __init__(self, field: str, filename: str, buf, content_type: str | None, chunk_bytes: int = 1 << 20) -> None:
+        part = RequestField(name=field, data=b"", filename=filename)
+        part.make_multipart(content_type=content_type)
+        boundary = choose_boundary()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._head = f"--{boundary}\r\n".encode("latin-1") + part.render_headers().encode("utf-8")
+        self._tail = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        self._view = buf.getbuffer()
+        self._chunk = chunk_bytes
+
+    def __len__(self) -> int:
+        return len(self._head) + len(self._view) + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        for i in range(0, len(self._view), self._chunk):
+            yield self._view[i:i + self._chunk]
+        yield self._tail
 
 st.set_page_config(page_title="Intelligent Document Summarization & Q&A", layout="wide")
+api = api_session()
+# every session key the page uses, set once so the body can read them directly
+for key, default in {
+    "doc_ids": [],
+    "summary_data": None,
+    "summary_validation": None,
+    "entities_data": None,
+    "entities_text": None,   # (entities, formatted) from an earlier rerun
+    "versions_cache": {},    # doc_id -> (fetched_at, versions)
+    "last_selected": None,
+    "show_versions": False,  # the versions panel's toggle
+    "regen_task": None,      # (doc_id, target_words, future) while a regenerate is in flight
+}.items():
+    st.session_state.setdefault(key, default)
 st.title("📄 Intelligent Document Summarization & Q&A")
 
 st.sidebar.header("Status & Settings")
@@ -15,13 +93,13 @@ st.sidebar.write(f"API: {API_BASE}")
 st.header("1) Upload Document")
 uploaded = st.file_uploader("Choose a file (.pdf, .docx, .txt, .html)", type=["pdf","docx","txt","html"])
 if st.button("Upload", type="primary") and uploaded:
-    files = {"file": (uploaded.name, uploaded.getvalue(), uploaded.type)}
+    body = MultipartFile("file", uploaded.name, uploaded, uploaded.type)
     try:
-        r = requests.post(f"{API_BASE}/documents", files=files, timeout=120)
+        r = api.post(f"{API_BASE}/documents", data=body, headers={"Content-Type": body.content_type}, timeout=120)
         if r.status_code == 200:
             data = r.json()
             st.success(f"Uploaded ✅ | id={data['document_id']} | status={data['status']}")
-            st.session_state.setdefault("doc_ids", []).append(data["document_id"])
+            st.session_state.doc_ids.append(data["document_id"])
         else:
             st.error(f"Upload failed: {r.text}")
     except Exception as e:
@@ -30,65 +108,80 @@ if st.button("Upload", type="primary") and uploaded:
 # ---------------- Summaries & Entities ----------------
 st.divider()
 st.header("2) Summaries & Entities")
-doc_ids = st.session_state.get("doc_ids", [])
+doc_ids = st.session_state.doc_ids
 if doc_ids:
     selected = st.selectbox("Select a document id", doc_ids)
-    target_words = st.slider("Target summary length (words)", min_value=100, max_value=800, value=350, step=50)
+    regen = st.session_state.regen_task
+    # a form, so dragging the slider doesn't rerun the page; only Regenerate submits it
+    with st.form("regen_form"):
+        target_words = st.slider("Target summary length (words)", min_value=100, max_value=800, value=350, step=50)
+        regen_clicked = st.form_submit_button("Regenerate", disabled=regen is not None)
+    # on a new selection, load its summary, entities and versions in one call instead of waiting for the buttons
+    bundle_fut = None
+    if st.session_state.last_selected != selected:
+        st.session_state["last_selected"] = selected
+        bundle_fut = api_pool().submit(api.get, f"{API_BASE}/documents/{selected}/bundle", timeout=60)
+    # while the versions panel is open: reuse a recent copy of the list, otherwise fetch it while
+    # the buttons below run; re-fetch if one of them changed the summary
+    versions_url = f"{API_BASE}/documents/{selected}/summary/versions"
+    versions_cache = st.session_state.versions_cache
+    cached = versions_cache.get(selected)
+    fresh = cached is not None and time.time() - cached[0] < VERSIONS_TTL_S
+    need_versions = st.session_state.show_versions and not fresh and bundle_fut is None
+    versions_fut = api_pool().submit(api.get, versions_url, timeout=60) if need_versions else None
+    summary_changed = False
+    # the LLM call can take minutes: run it on the pool and poll (regen_poller, end of the script)
+    if regen_clicked:
+        fut = api_pool().submit(
+            api.post,
+            f"{API_BASE}/documents/{selected}/summarize",
+            json={"target_words": target_words},
+            timeout=120
+        )
+        regen = st.session_state["regen_task"] = (selected, target_words, fut)
+    if regen is not None and regen[2].done():
+        doc_id, words, fut = regen
+        st.session_state["regen_task"] = None
+        try:
+            rr = fut.result()
+            if rr.status_code == 200:
+                payload = rr.json()
+                st.success(f"Regenerated (~{words} words).")
+                # directly update session with returned summary
+                st.session_state["summary_data"] = {
+                    "document_id": doc_id,
+                    "status": "ready",
+                    "summary": payload.get("summary", "")
+                }
+                st.session_state["summary_validation"] = payload.get("validation")
+                versions_cache.pop(doc_id, None)
+                summary_changed = doc_id == selected
+            else:
+                st.error(rr.text)
+        except Exception as e:
+            st.error(f"Error: {e}")
+    elif regen is not None:
+        st.info("Regenerating…")
+
     col1, col2 = st.columns(2)
 
     with col1:
-        c1, c2, c3 = st.columns(3)
+        c1, c2 = st.columns(2)
         with c1:
             if st.button("Get Summary"):
                 try:
-                    r = requests.get(f"{API_BASE}/documents/{selected}/summary", timeout=60)
+                    r = api.get(f"{API_BASE}/documents/{selected}/summary", timeout=60)
                     if r.status_code == 200:
                         st.session_state["summary_data"] = r.json()
+                        summary_changed = True  # may have just finished processing; refresh versions too
                     else:
                         st.error(r.text)
                 except Exception as e:
                     st.error(f"Error: {e}")
         with c2:
-            # ui/app.py (inside the Regenerate click handling)
-            if st.button("Regenerate"):
-                try:
-                    rr = requests.post(
-                        f"{API_BASE}/documents/{selected}/summarize",
-                        json={"target_words": target_words},
-                        timeout=120
-                    )
-                    if rr.status_code == 200:
-                        payload = rr.json()
-                        st.success(f"Regenerated (~{target_words} words).")
-                        # directly update session with returned summary
-                        st.session_state["summary_data"] = {
-                            "document_id": selected,
-                            "status": "ready",
-                            "summary": payload.get("summary", "")
-                        }
-                        st.session_state["summary_validation"] = payload.get("validation")
-                    else:
-                        st.error(rr.text)
-                except Exception as e:
-                    st.error(f"Error: {e}")
-
-
-            # if st.button("Regenerate"):
-            #     try:
-            #         rr = requests.post(f"{API_BASE}/documents/{selected}/summarize", json={"target_words": target_words}, timeout=120)
-            #         if rr.status_code == 200:
-            #             st.success(f"Regenerated (~{target_words} words).")
-            #             r = requests.get(f"{API_BASE}/documents/{selected}/summary", timeout=60)
-            #             if r.status_code == 200:
-            #                 st.session_state["summary_data"] = r.json()
-            #         else:
-            #             st.error(rr.text)
-            #     except Exception as e:
-            #         st.error(f"Error: {e}")
-        with c3:
             if st.button("Validate Summary"):
                 try:
-                    rv = requests.post(f"{API_BASE}/documents/{selected}/summary/validate", timeout=60)
+                    rv = api.post(f"{API_BASE}/documents/{selected}/summary/validate", timeout=60)
                     if rv.status_code == 200:
                         st.session_state["summary_validation"] = rv.json()["validation"]
                         st.success("Validation complete.")
@@ -97,64 +190,86 @@ if doc_ids:
                 except Exception as e:
                     st.error(f"Error: {e}")
 
-        sdata = st.session_state.get("summary_data")
+        bundle = preloaded_json(bundle_fut)
+        if bundle is not None:
+            if not summary_changed:  # don't override a regenerate that finished this run
+                st.session_state["summary_data"] = bundle["summary"]
+            st.session_state["entities_data"] = bundle["entities"]
+            versions_cache[selected] = (time.time(), bundle["versions"])
+        sdata = st.session_state.summary_data
         if sdata and sdata["document_id"] == selected:
             status = sdata["status"]
             if status == "ready":
-                edited = st.text_area("Summary (editable):", sdata["summary"] or "", height=260)
-                if st.button("Save Summary"):
-                    try:
-                        rr = requests.post(f"{API_BASE}/documents/{selected}/summary", json={"summary": edited}, timeout=60)
-                        if rr.status_code == 200:
-                            st.success("Summary saved.")
-                            st.session_state["summary_data"]["summary"] = edited
-                            st.session_state["summary_validation"] = rr.json().get("validation")
-                        else:
-                            st.error(rr.text)
-                    except Exception as e:
-                        st.error(f"Error: {e}")
-            elif status == "pending":
-                st.warning("Summary is pending.")
+                with st.form("summary_form"):
+                    edited = st.text_area("Summary (editable):", sdata["summary"] or "", height=260)
+                    if st.form_submit_button("Save Summary"):
+                        try:
+                            rr = api.post(f"{API_BASE}/documents/{selected}/summary", json={"summary": edited}, timeout=60)
+                            if rr.status_code == 200:
+                                st.success("Summary saved.")
+                                st.session_state["summary_data"]["summary"] = edited
+                                st.session_state["summary_validation"] = rr.json().get("validation")
+                                summary_changed = True
+                            else:
+                                st.error(rr.text)
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+            elif status in ("pending", "processing"):
+                st.warning("Summary is still being generated; load it again in a moment.")
             elif status == "error":
                 st.error(sdata["summary"] or "Processing error.")
             else:
                 st.error("Document not found.")
 
-        val = st.session_state.get("summary_validation")
+        val = st.session_state.summary_validation
         with st.expander("Summary Validation"):
             if val:
                 st.write(val)
             else:
                 st.caption("No validation run yet.")
 
-        with st.expander("Summary Versions & Rollback"):
+        # a toggle rather than an expander: an expander's body (and its GET) runs even while collapsed
+        if st.toggle("Summary Versions & Rollback", key="show_versions"):
             try:
-                lv = requests.get(f"{API_BASE}/documents/{selected}/summary/versions", timeout=60)
-                if lv.status_code == 200:
-                    versions = lv.json()
+                lv = None
+                if summary_changed or selected not in versions_cache:  # changed, or the bundle call failed
+                    lv = api.get(versions_url, timeout=60)
+                elif versions_fut is not None:
+                    lv = versions_fut.result()
+                if lv is not None and lv.status_code != 200:
+                    st.error(lv.text)
+                else:
+                    if lv is not None:
+                        versions_cache[selected] = (time.time(), lv.json())
+                    versions = versions_cache[selected][1]
                     if versions:
-                        st.table(versions)
+                        # st.table renders every row (and its validation dict) as static markup: show one page, newest first
+                        pages = (len(versions) + VERSIONS_PAGE_SIZE - 1) // VERSIONS_PAGE_SIZE
+                        page = st.number_input("Versions page", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+                        end = len(versions) - (int(page) - 1) * VERSIONS_PAGE_SIZE
+                        st.table(versions[max(0, end - VERSIONS_PAGE_SIZE):end][::-1])
                         idx = st.number_input("Rollback to version index", min_value=0, max_value=len(versions)-1, value=0, step=1)
                         if st.button("Rollback"):
-                            rb = requests.post(f"{API_BASE}/documents/{selected}/summary/rollback", params={"version_index": int(idx)}, timeout=60)
+                            rb = api.post(f"{API_BASE}/documents/{selected}/summary/rollback", params={"version_index": int(idx)}, timeout=60)
                             if rb.status_code == 200:
                                 st.success("Rolled back.")
-                                r = requests.get(f"{API_BASE}/documents/{selected}/summary", timeout=60)
+                                versions_cache.pop(selected, None)  # the rollback added a version
+                                r = api.get(f"{API_BASE}/documents/{selected}/summary", timeout=60)
                                 if r.status_code == 200:
                                     st.session_state["summary_data"] = r.json()
                             else:
                                 st.error(rb.text)
                     else:
                         st.info("No versions yet.")
-                else:
-                    st.error(lv.text)
             except Exception as e:
                 st.error(f"Error: {e}")
+        elif summary_changed:
+            versions_cache.pop(selected, None)  # closed: just make the next open fetch it
 
     with col2:
         if st.button("Get Entities"):
             try:
-                r = requests.get(f"{API_BASE}/documents/{selected}/entities", timeout=60)
+                r = api.get(f"{API_BASE}/documents/{selected}/entities", timeout=60)
                 if r.status_code == 200:
                     st.session_state["entities_data"] = r.json()
                 else:
@@ -162,40 +277,73 @@ if doc_ids:
             except Exception as e:
                 st.error(f"Error: {e}")
 
-        edata = st.session_state.get("entities_data")
+        edata = st.session_state.entities_data
         if edata and edata.get("status") == "ready":
-            text = json.dumps(edata.get("entities", {}), indent=2, ensure_ascii=False)
-            edited_entities = st.text_area("Entities (editable JSON):", text, height=260)
-            if st.button("Save Entities"):
-                try:
-                    payload = json.loads(edited_entities)
-                    rr = requests.post(f"{API_BASE}/documents/{selected}/entities", json={"entities": payload}, timeout=60)
-                    if rr.status_code == 200:
-                        st.success("Entities saved.")
-                        st.session_state["entities_data"]["entities"] = payload
-                    else:
-                        st.error(rr.text)
-                except Exception as e:
-                    st.error(f"Invalid JSON or network error: {e}")
+            entities = edata.get("entities", {})
+            fmt = st.session_state.entities_text
+            if fmt is None or fmt[0] is not entities:
+                fmt = st.session_state["entities_text"] = (entities, json.dumps(entities, indent=2, ensure_ascii=False))
+            text = fmt[1]
+            with st.form("entities_form"):
+                edited_entities = st.text_area("Entities (editable JSON):", text, height=260)
+                if st.form_submit_button("Save Entities"):
+                    try:
+                        payload = json.loads(edited_entities)
+                        rr = api.post(f"{API_BASE}/documents/{selected}/entities", json={"entities": payload}, timeout=60)
+                        if rr.status_code == 200:
+                            st.success("Entities saved.")
+                            st.session_state["entities_data"]["entities"] = payload
+                        else:
+                            st.error(rr.text)
+                    except Exception as e:
+                        st.error(f"Invalid JSON or network error: {e}")
 else:
     st.info("Upload a document first to view its summary and entities.")
 
 # ---------------- Q&A ----------------
 st.divider()
 st.header("3) Ask Questions")
-question = st.text_input("Your question")
-use_docs = st.multiselect("Restrict to document ids (optional)", options=doc_ids, default=doc_ids)
-if st.button("Ask"):
-    try:
-        r = requests.post(f"{API_BASE}/qa", json={"question": question, "document_ids": use_docs}, timeout=60)
-        if r.status_code == 200:
-            data = r.json()
-            st.subheader("Answer")
-            st.write(data["answer"])
-            st.caption(f"Sources: {', '.join(data.get('sources', [])) or 'N/A'}")
-            with st.expander("Answer Validation"):
-                st.write(data.get("validation", {}))
-        else:
-            st.error(r.text)
-    except Exception as e:
-        st.error(f"Error: {e}")
+
+# a fragment: typing a question or asking one reruns only this section, not the summaries above
+@st.fragment
+def qa_section(doc_ids):
+    question = st.text_input("Your question")
+    use_docs = st.multiselect("Restrict to document ids (optional)", options=doc_ids, default=doc_ids)
+    if st.button("Ask"):
+        try:
+            # NDJSON stream: answer text as it is generated, then a final line with sources + validation
+            with api.post(f"{API_BASE}/qa/stream", json={"question": question, "document_ids": use_docs}, timeout=60, stream=True) as r:
+                if r.status_code == 200:
+                    data = {}
+                    def answer_deltas():
+                        for line in r.iter_lines():
+                            if line:
+                                event = json.loads(line)
+                                if "delta" in event:
+                                    yield event["delta"]
+                                else:
+                                    data.update(event)
+                    st.subheader("Answer")
+                    st.write_stream(answer_deltas())
+                    if not data.get("done"):
+                        st.error(f"The answer was cut off ({data.get('error', 'stream ended early')}).")
+                    st.caption(f"Sources: {', '.join(data.get('sources', [])) or 'N/A'}")
+                    with st.expander("Answer Validation"):
+                        st.write(data.get("validation", {}))
+                else:
+                    st.error(r.text)
+        except Exception as e:
+            st.error(f"Error: {e}")
+
+qa_section(doc_ids)
+
+# poll an in-flight regenerate from a timed fragment: each tick reruns only this check, not the
+# page (no API fetches, no widgets); one full rerun once the result is there to be shown
+@st.fragment(run_every=1)
+def regen_poller():
+    regen = st.session_state.regen_task
+    if regen is not None and regen[2].done():
+        st.rerun()
+
+if st.session_state.regen_task is not None:
+    regen_poller()